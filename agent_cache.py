@@ -0,0 +1,125 @@
+import ast
+import hashlib
+import importlib.util
+import marshal
+import os
+import struct
+import threading
+from pathlib import Path
+from types import CodeType
+
+# 加载 Agent 源码时移除包含该标记的行（@AgentServer 装饰器及其导入）
+AGENT_FILTER_TOKEN = "AgentServer"
+# 过滤规则、扫描规则或缓存格式变化时修改版本号，使旧缓存全部失效
+_CACHE_VERSION = 2
+_RULES_KEY = f"{_CACHE_VERSION}:{AGENT_FILTER_TOKEN}".encode()
+_FILTER_HASH = hashlib.sha1(_RULES_KEY).digest()[:8]
+
+# 缓存文件头：Python 字节码魔数、规则哈希、源文件 mtime(ns)、源文件大小
+_HEADER = struct.Struct("<4s8sqq")
+
+# 装饰器方法名 -> 注册类别
+_DECORATOR_KINDS = {"custom_action": "action", "custom_recognition": "recognition"}
+
+
+def _is_agent_decorator(decorator: ast.expr) -> bool:
+    return (
+        isinstance(decorator, ast.Call)
+        and isinstance(decorator.func, ast.Attribute)
+        and isinstance(decorator.func.value, ast.Name)
+        and decorator.func.value.id == AGENT_FILTER_TOKEN
+        and decorator.func.attr in _DECORATOR_KINDS
+        and bool(decorator.args)
+        and isinstance(decorator.args[0], ast.Constant)
+        and isinstance(decorator.args[0].value, str)
+    )
+
+
+def scan_agent_source(source: str, file_path: str) -> tuple[str, list[dict]]:
+    """
+    单次解析完成扫描与过滤
+    用 AST 查找模块顶层被 @AgentServer.custom_action / custom_recognition 装饰的类，
+    不依赖装饰器与 class 所在行的相对位置，多个装饰器、多行参数均可识别；
+    返回移除 @AgentServer 装饰器（含跨行参数）及其它含 AgentServer 的行后的源码，
+    被移除的行替换为空行，保持报错行号与源文件一致
+    """
+    if f"@{AGENT_FILTER_TOKEN}" not in source:
+        return source, []
+    lines = source.split("\n")
+    drop = {i for i, line in enumerate(lines) if AGENT_FILTER_TOKEN in line}
+    found = []
+    for node in ast.parse(source, file_path).body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for decorator in node.decorator_list:
+            if not _is_agent_decorator(decorator):
+                continue
+            # 装饰器的 @ 位于表达式起始行
+            drop.update(range(decorator.lineno - 1, decorator.end_lineno))
+            found.append(
+                {
+                    "kind": _DECORATOR_KINDS[decorator.func.attr],
+                    "name": decorator.args[0].value,
+                    "class_name": node.name,
+                }
+            )
+    filtered = "\n".join("" if i in drop else line for i, line in enumerate(lines))
+    return filtered, found
+
+
+class AgentCodeCache:
+    """
+    Agent 模块的字节码与扫描结果缓存，类似 __pycache__
+    以源文件路径、mtime、大小及规则哈希为键，命中时直接 marshal 读取，跳过解析、过滤与编译
+    """
+
+    def __init__(self, cache_dir: str = "config/agent_cache"):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry(self, file_path: str) -> Path:
+        key = hashlib.sha1(os.path.realpath(file_path).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key[:16]}.bin"
+
+    @staticmethod
+    def _header(file_path: str) -> bytes:
+        stat = os.stat(file_path)
+        return _HEADER.pack(
+            importlib.util.MAGIC_NUMBER, _FILTER_HASH, stat.st_mtime_ns, stat.st_size
+        )
+
+    def get(self, file_path: str) -> tuple[CodeType, list[dict]]:
+        """返回 (过滤后源码的代码对象, 自定义组件列表)，源文件只读取一次；可在多线程中调用"""
+        header = self._header(file_path)
+        entry = self._entry(file_path)
+        try:
+            data = entry.read_bytes()
+            if data[: _HEADER.size] == header:
+                code, found = marshal.loads(data[_HEADER.size :])
+                with self._lock:
+                    self.hits += 1
+                return code, found
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        filtered, found = scan_agent_source(source, file_path)
+        code = compile(filtered, file_path, "exec")
+        with self._lock:
+            self.misses += 1
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免并发读到半个文件
+            tmp = entry.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(header + marshal.dumps((code, found)))
+            os.replace(tmp, entry)
+        except OSError:
+            # 缓存目录不可写时仅跳过缓存
+            pass
+        return code, found
+
+    def get_code(self, file_path: str) -> CodeType:
+        return self.get(file_path)[0]
@@ -0,0 +1,91 @@
+"""
+预览帧编码基准：720p / 1080p 截图的编码帧率与每帧字节数
+对比原先的 image[:, :, ::-1] + 每帧新建 BytesIO + 默认参数，与现在的 MaaWorker.encode_frame
+
+用法: python bench/encode_frame.py [--frames 60]
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maa_utils import MaaWorker
+
+
+class Encoder:
+    """只带编码参数的 MaaWorker 替身，与 ProcessWorker 复用 encode_frame 的方式相同"""
+
+    encode_frame = MaaWorker.encode_frame
+
+    def __init__(self):
+        self.jpeg_quality = 75
+        self.jpeg_subsampling = 2
+        self._jpeg_buffer = io.BytesIO()
+
+
+def synthetic_screen(width: int, height: int) -> np.ndarray:
+    """渐变背景、色块与少量噪声，近似游戏界面的 BGR 截图"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.stack(
+        [x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)],
+        axis=-1,
+    ).astype(np.uint8)
+    for _ in range(40):
+        x0, y0 = rng.integers(0, width - 200), rng.integers(0, height - 100)
+        image[y0 : y0 + 100, x0 : x0 + 200] = rng.integers(0, 256, 3, np.uint8)
+    noise = rng.integers(-8, 9, image.shape, np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def encode_legacy(image: np.ndarray) -> bytes:
+    """原实现"""
+    image_pil = Image.fromarray(image[:, :, ::-1])
+    img_byte_arr = io.BytesIO()
+    image_pil.save(img_byte_arr, format="JPEG")
+    return img_byte_arr.getvalue()
+
+
+def measure(encode, image: np.ndarray, frames: int) -> tuple[float, int]:
+    encode(image)
+    started = time.perf_counter()
+    size = 0
+    for _ in range(frames):
+        size = len(encode(image))
+    return frames / (time.perf_counter() - started), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args()
+    encoder = Encoder()
+    cases = [
+        ("原实现", lambda image: encode_legacy(image)),
+        ("encode_frame", lambda image: encoder.encode_frame(image)),
+        ("encode_frame 960px", lambda image: encoder.encode_frame(image, 960)),
+        ("encode_frame 640px", lambda image: encoder.encode_frame(image, 640)),
+        ("encode_frame webp", lambda image: encoder.encode_frame(image, fmt="webp")),
+    ]
+    for width, height in [(1280, 720), (1920, 1080)]:
+        image = synthetic_screen(width, height)
+        print(f"{width}x{height}")
+        for name, encode in cases:
+            try:
+                fps, size = measure(encode, image, args.frames)
+            except OSError as e:
+                # Pillow 未编译 WebP 支持
+                print(f"  {name:<20} 跳过: {e}")
+                continue
+            print(f"  {name:<20} {fps:7.1f} fps  {size / 1024:8.1f} KiB/帧")
+
+
+if __name__ == "__main__":
+    main()
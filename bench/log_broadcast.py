@@ -0,0 +1,61 @@
+"""
+日志广播基准：50 个 SSE 客户端时每条日志的广播与写出开销
+对比原先每个客户端各自 json.dumps 与现在的整帧编码一次、共享 bytes
+
+用法: python bench/log_broadcast.py [--clients 50] [--messages 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_utils import LogBroadcaster
+
+MESSAGE = "2026-01-01 12:00:00 正在执行任务: 日常任务 - 领取每日奖励 (3/12)"
+
+
+def bench_per_client(clients: int, messages: int) -> float:
+    """原实现：队列中存放原始消息，每个客户端的生成器各自序列化"""
+    queues = [asyncio.Queue(500) for _ in range(clients)]
+    started = time.perf_counter()
+    for seq in range(1, messages + 1):
+        for q in queues:
+            q.put_nowait((seq, MESSAGE))
+        for q in queues:
+            seq, data = q.get_nowait()
+            payload = json.dumps({"type": "log", "message": data}, ensure_ascii=False)
+            f"id: {seq}\ndata: {payload}\n\n".encode()
+    return (time.perf_counter() - started) / messages
+
+
+def bench_shared_frame(clients: int, messages: int) -> float:
+    """现实现：LogBroadcaster 编码一次，所有客户端写出同一份 bytes"""
+    broadcaster = LogBroadcaster()
+    subscribers = [broadcaster.add_client([]) for _ in range(clients)]
+    started = time.perf_counter()
+    for seq in range(1, messages + 1):
+        broadcaster.broadcast(seq, MESSAGE)
+        for client in subscribers:
+            client.last_seq, _ = client.queue.get_nowait()
+    return (time.perf_counter() - started) / messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+    per_client = bench_per_client(args.clients, args.messages)
+    shared = bench_shared_frame(args.clients, args.messages)
+    print(f"{args.clients} 个客户端，每条日志广播并写出的耗时:")
+    print(f"  每客户端 json.dumps: {per_client * 1e6:8.1f} us")
+    print(f"  共享 SSE 帧:         {shared * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+日志延迟基准：send_log 到 SSE 客户端队列的耗时
+对比原先的 SimpleQueue + 0.1 s 轮询与现在的 LogBridge
+
+用法: python bench/log_latency.py [--lines 200] [--interval 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import SimpleQueue
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_utils import LogBridge, LogBroadcaster, LogHistory
+
+
+def produce(put, lines: int, interval: float):
+    """模拟工作线程按固定间隔写日志，消息内容为发送时刻"""
+    for _ in range(lines):
+        put(repr(time.perf_counter()))
+        time.sleep(interval)
+
+
+async def collect(broadcaster: LogBroadcaster, lines: int) -> list[float]:
+    """模拟 SSE 客户端，按帧内携带的发送时刻计算延迟"""
+    client = broadcaster.add_client([])
+    latencies = []
+    while len(latencies) < lines:
+        _, frame = await client.queue.get()
+        received = time.perf_counter()
+        for event in frame.split(b"\n\n"):
+            if not event.startswith(b"id:"):
+                continue
+            message = json.loads(event.split(b"data: ", 1)[1])["message"]
+            for sent in message.split("\n"):
+                latencies.append(received - float(sent))
+    return latencies
+
+
+async def run_polling(lines: int, interval: float) -> list[float]:
+    """原实现：log_monitor 每 0.1 s 取空 SimpleQueue"""
+    queue = SimpleQueue()
+    history = LogHistory()
+    broadcaster = LogBroadcaster()
+    collector = asyncio.create_task(collect(broadcaster, lines))
+
+    async def monitor():
+        while True:
+            while not queue.empty():
+                msg = queue.get_nowait()
+                broadcaster.broadcast(history.append(msg), msg)
+            await asyncio.sleep(0.1)
+
+    task = asyncio.create_task(monitor())
+    thread = threading.Thread(target=produce, args=(queue.put, lines, interval))
+    thread.start()
+    latencies = await collector
+    thread.join()
+    task.cancel()
+    return latencies
+
+
+async def run_bridge(lines: int, interval: float) -> list[float]:
+    """现实现：LogBridge 投递到事件循环，按批合并广播（同 WorkerSlot._log_monitor）"""
+    bridge = LogBridge(asyncio.get_running_loop())
+    history = LogHistory()
+    broadcaster = LogBroadcaster()
+    collector = asyncio.create_task(collect(broadcaster, lines))
+
+    async def monitor():
+        while True:
+            batch = await bridge.get_batch()
+            seq = 0
+            for msg in batch:
+                seq = history.append(msg)
+            broadcaster.broadcast(seq, "\n".join(batch))
+
+    task = asyncio.create_task(monitor())
+    thread = threading.Thread(target=produce, args=(bridge.put, lines, interval))
+    thread.start()
+    latencies = await collector
+    thread.join()
+    task.cancel()
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    ms = sorted(value * 1000 for value in latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(
+        f"{name:<22} n={len(ms):<5} mean={statistics.mean(ms):7.2f} ms  "
+        f"p50={statistics.median(ms):7.2f} ms  p95={p95:7.2f} ms  max={ms[-1]:7.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.02)
+    args = parser.parse_args()
+    report("SimpleQueue + 0.1s 轮询", await run_polling(args.lines, args.interval))
+    report("LogBridge", await run_bridge(args.lines, args.interval))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
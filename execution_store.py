@@ -0,0 +1,163 @@
+from datetime import datetime
+from pathlib import Path
+
+import aiosqlite
+
+from models.scheduler import TaskExecution
+
+# 执行记录表结构版本，保存在 PRAGMA user_version 中
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_executions (
+    id TEXT PRIMARY KEY,
+    task_id TEXT NOT NULL,
+    task_name TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_executions_started ON task_executions (started_at);
+CREATE INDEX IF NOT EXISTS idx_executions_task ON task_executions (task_id, started_at);
+CREATE INDEX IF NOT EXISTS idx_executions_status ON task_executions (status, started_at);
+"""
+
+_COLUMNS = "id, task_id, task_name, started_at, finished_at, status, error_message"
+
+
+def _to_text(value: datetime | None) -> str | None:
+    """统一存为本地时间的 ISO 字符串，保证按字符串比较即按时间比较"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _to_execution(row: tuple) -> TaskExecution:
+    return TaskExecution(
+        id=row[0],
+        task_id=row[1],
+        task_name=row[2],
+        started_at=row[3],
+        finished_at=row[4],
+        status=row[5],
+        error_message=row[6],
+    )
+
+
+class ExecutionStore:
+    """
+    定时任务执行记录的持久化存储（SQLite）
+    记录只追加、按主键原地更新状态；按任务、状态、开始时间建立索引，支持分页与筛选
+    """
+
+    def __init__(self, db_path: str):
+        self._db_path = Path(db_path)
+        self._db: aiosqlite.Connection | None = None
+
+    async def open(self):
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = await aiosqlite.connect(self._db_path)
+        # WAL 模式下读写互不阻塞，与调度器的任务表共用数据库文件
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        async with self._db.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        if version < SCHEMA_VERSION:
+            await self._db.executescript(_SCHEMA)
+            await self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        # 上次退出时仍在排队或运行的记录不会再更新，标记为已中断
+        await self._db.execute(
+            "UPDATE task_executions SET status = 'stopped', "
+            "error_message = COALESCE(error_message, '程序退出时中断') "
+            "WHERE status IN ('queued', 'running')"
+        )
+        await self._db.commit()
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    async def add(self, execution: TaskExecution):
+        await self._db.execute(
+            f"INSERT INTO task_executions ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                execution.id,
+                execution.task_id,
+                execution.task_name,
+                _to_text(execution.started_at),
+                _to_text(execution.finished_at),
+                execution.status,
+                execution.error_message,
+            ),
+        )
+        await self._db.commit()
+
+    async def mark_running(self, execution_id: str, started_at: datetime):
+        """排队结束、开始执行时更新状态与开始时间"""
+        await self._db.execute(
+            "UPDATE task_executions SET status = 'running', started_at = ? WHERE id = ?",
+            (_to_text(started_at), execution_id),
+        )
+        await self._db.commit()
+
+    async def update_status(
+        self,
+        execution_id: str,
+        status: str,
+        finished_at: datetime,
+        error_message: str | None = None,
+    ):
+        """按主键更新状态，未提供错误信息时保留原值"""
+        await self._db.execute(
+            "UPDATE task_executions SET status = ?, finished_at = ?, "
+            "error_message = COALESCE(?, error_message) WHERE id = ?",
+            (status, _to_text(finished_at), error_message, execution_id),
+        )
+        await self._db.commit()
+
+    async def get(self, execution_id: str) -> TaskExecution | None:
+        async with self._db.execute(
+            f"SELECT {_COLUMNS} FROM task_executions WHERE id = ?", (execution_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return _to_execution(row) if row else None
+
+    async def query(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status: str | None = None,
+        task_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> tuple[int, list[TaskExecution]]:
+        """按开始时间倒序分页查询，返回 (符合条件的总数, 当前页记录)"""
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if task_id:
+            conditions.append("task_id = ?")
+            params.append(task_id)
+        if start:
+            conditions.append("started_at >= ?")
+            params.append(_to_text(start))
+        if end:
+            conditions.append("started_at < ?")
+            params.append(_to_text(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        async with self._db.execute(
+            f"SELECT COUNT(*) FROM task_executions {where}", params
+        ) as cursor:
+            (total,) = await cursor.fetchone()
+        async with self._db.execute(
+            f"SELECT {_COLUMNS} FROM task_executions {where} "
+            "ORDER BY started_at DESC LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return total, [_to_execution(row) for row in rows]
@@ -1,5 +1,6 @@
 import type { InterfaceModel } from "../types/interface"
 import type {
+  ExecutionFilters,
   ScheduledTaskCreate,
   ScheduledTaskUpdate,
   SchedulerApiResponse,
@@ -374,8 +375,15 @@ export function resumeSchedulerTask(taskId: string): Promise<SchedulerApiRespons
   }).then((res) => res.json())
 }
 
-export function getSchedulerExecutions(limit: number = 50): Promise<SchedulerApiResponse> {
-  return fetch(`/api/scheduler/executions?limit=${limit}`, { method: "GET" }).then((res) =>
+export function getSchedulerExecutions(
+  limit: number = 50,
+  filters: ExecutionFilters = {},
+): Promise<SchedulerApiResponse> {
+  const params = new URLSearchParams({ limit: String(limit) })
+  for (const [key, value] of Object.entries(filters)) {
+    if (value !== undefined && value !== "") params.set(key, String(value))
+  }
+  return fetch(`/api/scheduler/executions?${params}`, { method: "GET" }).then((res) =>
     res.json(),
   )
 }
@@ -5,6 +5,7 @@ export class SSEClient {
   private reconnectInterval: number = 3000
   private reconnectAttempts: number = 0
   private maxReconnectAttempts: number = 5
+  private lastEventId: string = ""
 
   constructor(url: string) {
     this.url = url
@@ -12,9 +13,16 @@ export class SSEClient {
   }
 
   private connect(): void {
-    this.eventSource = new EventSource(this.url)
+    // 重连时携带最后收到的消息序号，服务端只回放缺失的部分
+    const url = this.lastEventId
+      ? `${this.url}?last_event_id=${encodeURIComponent(this.lastEventId)}`
+      : this.url
+    this.eventSource = new EventSource(url)
 
     this.eventSource.onmessage = (event) => {
+      if (event.lastEventId) {
+        this.lastEventId = event.lastEventId
+      }
       try {
         const data = JSON.parse(event.data)
         this.dispatchEvent(data.type, data)
@@ -5,6 +5,7 @@ import type {
   ScheduledTaskCreate,
   ScheduledTaskUpdate,
   TaskExecution,
+  SchedulerEvent,
 } from "../types/scheduler"
 import {
   getSchedulerTasks,
@@ -15,6 +16,7 @@ import {
   resumeSchedulerTask,
   getSchedulerExecutions,
 } from "../script/api"
+import { SSEClient } from "../script/sse"
 
 export const useSchedulerStore = defineStore("scheduler", () => {
   // State
@@ -157,6 +159,49 @@ export const useSchedulerStore = defineStore("scheduler", () => {
     }
   }
 
+  // 订阅调度事件，任务与执行记录随推送更新，无需轮询
+  let events: SSEClient | null = null
+
+  function subscribeEvents() {
+    if (events) return
+    events = new SSEClient("/api/scheduler/events")
+    events.addEventListener("scheduler", handleEvent)
+  }
+
+  function unsubscribeEvents() {
+    events?.close()
+    events = null
+  }
+
+  function handleEvent(data: SchedulerEvent) {
+    if (data.event === "removed") {
+      tasks.value = tasks.value.filter((t) => t.id !== data.task_id)
+      return
+    }
+    if (data.task) {
+      const index = tasks.value.findIndex((t) => t.id === data.task_id)
+      if (index !== -1) {
+        tasks.value[index] = data.task
+      } else {
+        tasks.value.push(data.task)
+      }
+    } else {
+      const task = tasks.value.find((t) => t.id === data.task_id)
+      if (task) {
+        task.next_run_time = data.next_run_time ?? undefined
+      }
+    }
+    if (data.execution) {
+      const execution = data.execution
+      const index = executions.value.findIndex((e) => e.id === execution.id)
+      if (index !== -1) {
+        executions.value[index] = execution
+      } else {
+        executions.value.unshift(execution)
+      }
+    }
+  }
+
   function getTaskById(taskId: string): ScheduledTask | undefined {
     return tasks.value.find((t) => t.id === taskId)
   }
@@ -182,6 +227,8 @@ export const useSchedulerStore = defineStore("scheduler", () => {
     deleteTask,
     toggleTask,
     fetchExecutions,
+    subscribeEvents,
+    unsubscribeEvents,
     getTaskById,
     clearError,
   }
@@ -30,6 +30,8 @@ const defaultSettings: SettingsModel = {
     reminderInterval: 30,
     autoRetry: true,
     maxRetryCount: 3,
+    executionBackend: "thread",
+    lazyAgentLoading: false,
   },
   about: {
     version: "",
@@ -1,6 +1,6 @@
 export type TriggerType = "cron" | "date" | "interval"
 
-export type ExecutionStatus = "running" | "success" | "failed" | "stopped"
+export type ExecutionStatus = "queued" | "running" | "success" | "failed" | "stopped"
 
 export interface CronTriggerConfig {
   type: "cron"
@@ -34,6 +34,7 @@ export interface ScheduledTask {
   trigger_config: TriggerConfig
   task_list: string[]
   task_options: Record<string, string>
+  priority?: number // 优先级，数值越大越先执行
   next_run_time?: string // ISO 8601 datetime string
   created_at: string // ISO 8601 datetime string
   updated_at: string // ISO 8601 datetime string
@@ -47,6 +48,7 @@ export interface ScheduledTaskCreate {
   trigger_config: TriggerConfig
   task_list: string[]
   task_options: Record<string, string>
+  priority?: number
 }
 
 export interface ScheduledTaskUpdate {
@@ -57,6 +59,7 @@ export interface ScheduledTaskUpdate {
   trigger_config?: TriggerConfig
   task_list?: string[]
   task_options?: Record<string, string>
+  priority?: number
 }
 
 export interface TaskExecution {
@@ -75,4 +78,36 @@ export interface SchedulerApiResponse {
   tasks?: ScheduledTask[]
   task?: ScheduledTask
   executions?: TaskExecution[]
+  total?: number
+}
+
+// 执行历史的分页与筛选参数，时间范围为 [start, end)
+export interface ExecutionFilters {
+  offset?: number
+  status?: ExecutionStatus
+  task_id?: string
+  start?: string // ISO 8601 datetime string
+  end?: string // ISO 8601 datetime string
+}
+
+// /api/scheduler/events 推送的调度事件
+export type SchedulerEventName =
+  | "added"
+  | "modified"
+  | "removed"
+  | "paused"
+  | "resumed"
+  | "submitted"
+  | "started"
+  | "executed"
+  | "failed"
+  | "stopped"
+
+export interface SchedulerEvent {
+  type: "scheduler"
+  event: SchedulerEventName
+  task_id: string
+  next_run_time: string | null
+  task?: ScheduledTask // 任务增删改、暂停恢复时携带
+  execution?: TaskExecution // 执行状态变化时携带
 }
@@ -32,6 +32,8 @@ export interface RuntimeSettings {
   reminderInterval: number
   autoRetry: boolean
   maxRetryCount: number
+  executionBackend: "thread" | "process"
+  lazyAgentLoading: boolean
 }
 
 // 关于我们（包含联系方式）
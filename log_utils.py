@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Literal
+
+
+class LogBridge:
+    """
+    工作线程到事件循环的日志桥
+    通过 call_soon_threadsafe 投递消息，空闲时不占用事件循环
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+
+    def put(self, msg: str):
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, msg)
+        except RuntimeError:
+            # 事件循环已关闭（程序退出中），丢弃消息
+            pass
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    async def get_batch(self, max_size: int = 100) -> list[str]:
+        """等待至少一条消息，并取出同一时刻已积压的消息，合并发送"""
+        batch = [await self._queue.get()]
+        while len(batch) < max_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+
+class LogHistory:
+    """
+    定长环形日志缓冲区
+    为每条消息分配单调递增的序号，用于 SSE 断线续传
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self._buffer: deque[tuple[int, str]] = deque(maxlen=capacity)
+        self._last_id = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def append(self, msg: str) -> int:
+        self._last_id += 1
+        self._buffer.append((self._last_id, msg))
+        return self._last_id
+
+    def since(self, last_id: int | None = None) -> list[tuple[int, str]]:
+        """返回序号大于 last_id 的消息，last_id 为空时返回全部"""
+        # 序号超前说明服务端已重启，客户端需要完整回放
+        if last_id is None or last_id > self._last_id:
+            return list(self._buffer)
+        count = min(self._last_id - last_id, len(self._buffer))
+        if count <= 0:
+            return []
+        return list(islice(reversed(self._buffer), count))[::-1]
+
+
+SSE_HEARTBEAT = b": ping\n\n"
+
+
+def encode_sse_event(seq: int | None, data: dict) -> bytes:
+    """将事件编码为完整的 SSE 帧，seq 为空时不携带 id，不影响客户端的续传位置"""
+    payload = json.dumps(data, ensure_ascii=False)
+    if seq is None:
+        return f"data: {payload}\n\n".encode("utf-8")
+    return f"id: {seq}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class LogClient:
+    """单个 SSE 订阅者的有界队列与统计信息"""
+
+    def __init__(self, maxsize: int):
+        self.id = uuid.uuid4().hex[:8]
+        # None 作为断开信号
+        self.queue: asyncio.Queue[tuple[int, bytes] | None] = asyncio.Queue(maxsize)
+        self.connected_at = time.time()
+        self.last_seq = 0
+        self.dropped = 0
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    def stats(self, head_seq: int) -> dict:
+        return {
+            "id": self.id,
+            "connected_at": self.connected_at,
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "dropped": self.dropped,
+            "last_seq": self.last_seq,
+            "lag": max(0, head_seq - self.last_seq),
+        }
+
+
+class LogBroadcaster:
+    """
+    日志广播器
+    每条消息只编码一次 SSE 帧，所有客户端共享同一份 bytes
+    每个客户端使用有界队列，广播不等待任何客户端；队列满时按 policy 处理：
+    drop_oldest 丢弃最旧消息，coalesce 合并积压消息（超过 coalesce_max_bytes 时断开），
+    disconnect 断开该客户端
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 500,
+        policy: Literal["drop_oldest", "coalesce", "disconnect"] = "drop_oldest",
+        coalesce_max_bytes: int = 1024 * 1024,
+    ):
+        self._clients: list[LogClient] = []
+        self._maxsize = maxsize
+        self._policy = policy
+        self._coalesce_max_bytes = coalesce_max_bytes
+        self._head_seq = 0
+
+    def add_client(self, history: list[tuple[int, str]]) -> LogClient:
+        client = LogClient(self._maxsize)
+        # 历史回放拼接为一个队列项，不受溢出策略影响；大小受 LogHistory 容量限制
+        if history:
+            frames = b"".join(self.encode(seq, msg) for seq, msg in history)
+            client.queue.put_nowait((history[-1][0], frames))
+        self._clients.append(client)
+        return client
+
+    def remove_client(self, client: LogClient):
+        if client in self._clients:
+            self._clients.remove(client)
+
+    @staticmethod
+    def encode(seq: int, message: str) -> bytes:
+        return encode_sse_event(seq, {"type": "log", "message": message})
+
+    def broadcast(self, seq: int, message: str):
+        self._head_seq = seq
+        frame = self.encode(seq, message)
+        for client in list(self._clients):
+            self._offer(client, seq, frame)
+
+    def publish(self, data: dict):
+        """广播状态类事件，不分配序号、不进入历史，断线重连时不回放"""
+        frame = encode_sse_event(None, data)
+        for client in list(self._clients):
+            self._offer(client, self._head_seq, frame)
+
+    def stats(self) -> list[dict]:
+        return [client.stats(self._head_seq) for client in self._clients]
+
+    def _offer(self, client: LogClient, seq: int, frame: bytes):
+        q = client.queue
+        if not q.full():
+            q.put_nowait((seq, frame))
+            return
+        if self._policy == "disconnect":
+            client.close()
+            self.remove_client(client)
+        elif self._policy == "coalesce":
+            # 将积压的帧拼接为一次写出，序号取最新
+            pending = [q.get_nowait()[1] for _ in range(q.qsize())]
+            pending.append(frame)
+            merged = b"".join(pending)
+            if len(merged) > self._coalesce_max_bytes:
+                # 积压过多说明客户端已停滞，断开后由其按 Last-Event-ID 续传
+                client.close()
+                self.remove_client(client)
+                return
+            q.put_nowait((seq, merged))
+        else:
+            q.get_nowait()
+            client.dropped += 1
+            q.put_nowait((seq, frame))
@@ -1,47 +1,123 @@
 import os
 import subprocess
+import threading
 import time
 import traceback
-from queue import SimpleQueue
 import json
+import copy
+import hashlib
 import plyer
 from maa.controller import AdbController
+from maa.custom_action import CustomAction
+from maa.custom_recognition import CustomRecognition
 from maa.resource import Resource
 from maa.tasker import Tasker
 from maa.toolkit import Toolkit
 import importlib.util
 import importlib.abc
+from concurrent.futures import ThreadPoolExecutor
 import re
 import sys
 from pathlib import Path
+from typing import Callable, Literal
 import httpx
 import io
+import numpy as np
 from PIL import Image
 from models.interface import InterfaceModel
 from models.settings import SettingsModel
+from log_utils import LogBridge
+from agent_cache import AgentCodeCache
 
-resource = Resource()
-resource.set_cpu()
+
+class _LazyCustom:
+    """首次被调用时才导入 Agent 模块并实例化，之后直接转发"""
+
+    def __init__(self, name: str, factory: Callable[[], object]):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _target(self):
+        if self._instance is None and not self._failed:
+            with self._lock:
+                if self._instance is None and not self._failed:
+                    try:
+                        self._instance = self._factory()
+                    except Exception as e:
+                        # 失败后不再重试，避免每次识别都重复导入
+                        self._failed = True
+                        print(f"Warning: Failed to load custom '{self._name}': {e}")
+                        traceback.print_exc()
+        return self._instance
+
+
+class LazyCustomAction(_LazyCustom, CustomAction):
+    def __init__(self, name: str, factory: Callable[[], object]):
+        CustomAction.__init__(self)
+        _LazyCustom.__init__(self, name, factory)
+
+    def run(self, context, argv):
+        target = self._target()
+        return target.run(context, argv) if target is not None else False
+
+
+class LazyCustomRecognition(_LazyCustom, CustomRecognition):
+    def __init__(self, name: str, factory: Callable[[], object]):
+        CustomRecognition.__init__(self)
+        _LazyCustom.__init__(self, name, factory)
+
+    def analyze(self, context, argv):
+        target = self._target()
+        return target.analyze(context, argv) if target is not None else None
 
 
 class MaaWorker:
-    def __init__(self, queue: SimpleQueue, interface):
+    def __init__(self, queue: LogBridge, interface, lazy_agent: bool = False):
         Toolkit.init_option("./")
         self.interface: InterfaceModel = interface
         self.queue = queue
+        # 每个 Worker 独立持有 Resource，便于多设备并行
+        self.resource = Resource()
+        self.resource.set_cpu()
         self.tasker = Tasker()
         self.controller = None
         self.connected = False
-        self.stop_flag = False
+        self.stop_event = threading.Event()
+        self.current_resource: str | None = None
+        # 已加载的资源包指纹，以及按指纹缓存的热 Resource（LRU，按插入顺序淘汰）
+        self._loaded_bundle: tuple | None = None
+        self._resource_cache: dict[tuple, Resource] = {}
+        self.resource_cache_size = 3
+        # 在加载 Agent 之前预先创建备用 Resource，供切换资源时使用
+        self._spare_resources: list[Resource] = []
+        for _ in range(self.resource_cache_size):
+            spare = Resource()
+            spare.set_cpu()
+            self._spare_resources.append(spare)
+        # Agent 中的自定义 Action / Recognition 实例，新建 Resource 时重新注册
+        self._custom_actions: dict[str, object] = {}
+        self._custom_recognitions: dict[str, object] = {}
+        # 延迟模式下只登记代理，Agent 模块在首次使用时才导入
+        self.lazy_agent = lazy_agent
+        self._agent_loader: importlib.abc.MetaPathFinder | None = None
+        # 选项组合哈希 -> 合并后的 pipeline_override
+        self._override_cache: dict[str, dict] = {}
+        self._applied_options: str | None = None
         self.send_log("MAA初始化成功")
         self.agent_process: subprocess.Popen | None = None
         self.load_agent()
         self.send_log("Agent加载完成")
         self.http_client = httpx.Client(timeout=30)
+        # 实时预览的 JPEG 编码参数，subsampling: 0=4:4:4, 1=4:2:2, 2=4:2:0
+        self.jpeg_quality = 75
+        self.jpeg_subsampling = 2
+        self._jpeg_buffer = io.BytesIO()
 
     def send_log(self, msg):
         self.queue.put(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime())} {msg}")
-        time.sleep(0.05)
 
     def send_notification(self, title, message):
         with open("config/settings.json", "r", encoding="utf-8") as f:
@@ -131,7 +207,7 @@ class MaaWorker:
             )
             self.send_log(conn_fail_msg)
             return self.connected
-        if self.tasker.bind(resource, controller):
+        if self.tasker.bind(self.resource, controller):
             self.connected = True
             self.controller = controller
             self.send_log("设备连接成功")
@@ -145,30 +221,158 @@ class MaaWorker:
             self.send_log(conn_fail_msg)
         return self.connected
 
+    @staticmethod
+    def _bundle_fingerprint(path: str) -> tuple:
+        """资源包指纹：文件数、总大小与最新修改时间，任一文件变化都会改变指纹"""
+        count = size = mtime = 0
+        stack = [path]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        count += 1
+                        size += stat.st_size
+                        mtime = max(mtime, stat.st_mtime_ns)
+        return path, count, size, mtime
+
+    def _new_resource(self) -> Resource:
+        """
+        取一个空 Resource 并注册自定义组件
+        优先使用预先创建的备用实例：导入 Agent 模块后 MaaFramework 进入 AgentServer 模式，
+        此时再创建 Resource 会失败
+        """
+        if self._spare_resources:
+            resource = self._spare_resources.pop()
+        else:
+            try:
+                resource = Resource()
+            except Exception as e:
+                self.send_log(f"无法创建新的 Resource: {e}")
+                raise RuntimeError(f"无法创建新的 Resource: {e}") from e
+            resource.set_cpu()
+        for name, instance in self._custom_actions.items():
+            resource.register_custom_action(name, instance)
+        for name, instance in self._custom_recognitions.items():
+            resource.register_custom_recognition(name, instance)
+        return resource
+
+    def _release_resource(self, resource: Resource):
+        """清空不再使用的 Resource，放回备用池"""
+        resource.clear()
+        self._spare_resources.append(resource)
+
     def set_resource(self, resource_name):
         def replace(path: str):
             return os.path.realpath(path.replace("{PROJECT_DIR}", os.getcwd()))
 
         for i in self.interface.resource:
             if i.name == resource_name:
-                resource.post_bundle(replace(i.path[0])).wait()
-                if len(i.path) > 1:
-                    resource.post_bundle(replace(i.path[1])).wait()
-                self.send_log(f"资源已设置为: {i.name}")
+                break
+        else:
+            raise ValueError(f"资源不存在: {resource_name}")
+
+        key = tuple(self._bundle_fingerprint(replace(p)) for p in i.path[:2])
+        if key == self._loaded_bundle:
+            self.send_log(f"资源未变化，跳过加载: {i.name}")
+            return None
+        resource = self._resource_cache.pop(key, None)
+        if resource is None:
+            # 首次加载直接使用初始化时创建的空 Resource
+            if self._loaded_bundle is None:
+                resource = self.resource
+            else:
+                resource = self._new_resource()
+            for index, (path, *_) in enumerate(key, 1):
+                self.send_log(f"正在加载资源包 ({index}/{len(key)}): {path}")
+                if not resource.post_bundle(path).wait().succeeded:
+                    if resource is self.resource:
+                        # 加载了一半的 Resource 不再复用，下次从空 Resource 重新加载
+                        self.resource = self._new_resource()
+                        if self.controller is not None:
+                            self.tasker.bind(self.resource, self.controller)
+                    self._release_resource(resource)
+                    self.send_log(f"资源包加载失败: {path}")
+                    raise RuntimeError(f"资源包加载失败: {path}")
+        if resource is not self.resource:
+            self.resource = resource
+            if self.controller is not None:
+                self.tasker.bind(self.resource, self.controller)
+        # 只缓存加载成功的 Resource；在切换之后淘汰，避免清空仍绑定的实例
+        self._resource_cache[key] = resource
+        while len(self._resource_cache) > self.resource_cache_size:
+            evicted = self._resource_cache.pop(next(iter(self._resource_cache)))
+            self._release_resource(evicted)
+        self._loaded_bundle = key
+        # 重新加载资源会覆盖之前的 pipeline_override
+        self.current_resource = i.name
+        self._applied_options = None
+        self.send_log(f"资源已设置为: {i.name}")
+        return None
+
+    def _option_override(self, option_name: str, case_name: str) -> dict | None:
+        """查找单个选项对应的 pipeline_override"""
+        option = (self.interface.option or {}).get(option_name)
+        if option is None:
+            return None
+        if option.type == "select" and option.cases:
+            for case in option.cases:
+                if case.name == case_name:
+                    return case.pipeline_override
+        elif option.type == "input":
+            return option.pipeline_override
         return None
 
     def set_option(self, option_name: str, case_name: str):
-        if option_name in self.interface.option:
-            option = self.interface.option[option_name]
-            if option.type == "select" and option.cases:
-                for case in option.cases:
-                    if case.name == case_name:
-                        resource.override_pipeline(case.pipeline_override)
-                        # self.send_log(f"选项 {option_name} 设置为: {case_name}")
-                        return
-            elif option.type == "input" and option.pipeline_override:
-                resource.override_pipeline(option.pipeline_override)
-                return
+        override = self._option_override(option_name, case_name)
+        if override:
+            self.resource.override_pipeline(override)
+            # 单独覆盖后，已应用的选项组合不再可信
+            self._applied_options = None
+
+    @staticmethod
+    def _merge_override(target: dict, override: dict):
+        """
+        只在 节点 -> 字段 这一层合并，字段值整体替换，
+        与逐个 override_pipeline 的结果一致（如 custom_action_param 不做深合并）
+        """
+        for node, fields in override.items():
+            if isinstance(fields, dict) and isinstance(target.get(node), dict):
+                target[node].update(copy.deepcopy(fields))
+            else:
+                target[node] = copy.deepcopy(fields)
+
+    def apply_options(self, options: dict[str, str]):
+        """
+        按顺序合并所有选项的 pipeline_override，一次 override_pipeline 完成应用
+        合并结果按 (资源, 选项) 缓存；与当前已应用的组合相同时直接跳过
+        """
+        key = hashlib.sha256(
+            json.dumps(
+                [self.current_resource, list(options.items())], ensure_ascii=False
+            ).encode("utf-8")
+        ).hexdigest()
+        if key == self._applied_options:
+            return
+        merged = self._override_cache.get(key)
+        if merged is None:
+            merged = {}
+            for name, case in options.items():
+                override = self._option_override(name, case)
+                if override:
+                    self._merge_override(merged, override)
+            self._override_cache[key] = merged
+            if len(self._override_cache) > 32:
+                self._override_cache.pop(next(iter(self._override_cache)))
+        if merged:
+            self.resource.override_pipeline(merged)
+        self._applied_options = key
 
     def black_magic(self):
         """
@@ -216,8 +420,9 @@ class MaaWorker:
 
         # 自定义 Loader，利用 importlib 规范支持循环 / 相互导入
         class AgentLoader(importlib.abc.MetaPathFinder, importlib.abc.Loader):
-            def __init__(self, mapping):
+            def __init__(self, mapping, code_cache: AgentCodeCache):
                 self.mapping = mapping
+                self.code_cache = code_cache
 
             def find_spec(self, fullname, path, target=None):
                 if fullname not in self.mapping:
@@ -240,15 +445,8 @@ class MaaWorker:
             def exec_module(self, module):
                 record = self.mapping[module.__name__]
                 file_path = record["path"]
-                with open(file_path, "r", encoding="utf-8") as f:
-                    source = f.read()
-
-                # 移除 @AgentServer 装饰器，避免注册时重复绑定
-                if "@AgentServer" in source:
-                    filtered_lines = [
-                        line for line in source.split("\n") if "AgentServer" not in line
-                    ]
-                    source = "\n".join(filtered_lines)
+                # 扫描阶段已准备好的字节码只使用一次，之后按需从缓存读取
+                code = record.pop("code", None) or self.code_cache.get_code(file_path)
 
                 module.__file__ = file_path
                 module.__loader__ = self
@@ -258,51 +456,62 @@ class MaaWorker:
                 else:
                     module.__package__ = module.__name__.rpartition(".")[0]
 
-                exec(compile(source, file_path, "exec"), module.__dict__)
+                exec(code, module.__dict__)
 
-        loader = AgentLoader(module_map)
+        code_cache = AgentCodeCache()
+        loader = AgentLoader(module_map, code_cache)
         sys.meta_path.insert(0, loader)
 
-        # 收集需要注册的 Action 和 Recognition
-        custom_action_pattern = re.compile(r"@AgentServer.custom_action\(\".*\"\)")
-        custom_recognition_pattern = re.compile(
-            r"@AgentServer.custom_recognition\(\".*\"\)"
-        )
-        to_register = {"action": [], "recognition": []}
-
-        for module_name, info in module_map.items():
-            file_path = info.get("path")
+        def prepare(module_name: str):
+            """读取源文件一次，完成扫描与编译（或直接命中缓存）"""
+            record = module_map[module_name]
             try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
+                record["code"], found = code_cache.get(record["path"])
+            except Exception as e:
+                # 语法错误等留到导入时按原有方式报告
+                print(f"Error scanning {record['path']}: {e}")
+                return module_name, []
+            return module_name, found
 
-                for i, line in enumerate(lines):
-                    match_action = re.match(custom_action_pattern, line.strip())
-                    match_recognition = re.match(
-                        custom_recognition_pattern, line.strip()
+        # 收集需要注册的 Action 和 Recognition
+        to_register = {"action": [], "recognition": []}
+        with ThreadPoolExecutor() as executor:
+            for module_name, found in executor.map(prepare, list(module_map)):
+                for item in found:
+                    to_register[item["kind"]].append(
+                        {
+                            "name": item["name"],
+                            "class_name": item["class_name"],
+                            "module_name": module_name,
+                        }
                     )
+        # 扫描阶段已读取全部模块的缓存，按需加载与立即加载都在此记录命中率
+        total = code_cache.hits + code_cache.misses
+        self.send_log(f"Agent字节码缓存命中 {code_cache.hits}/{total}")
 
-                    if match_action or match_recognition:
-                        name = line.split('("')[1].split('")')[0]
-                        if i + 1 < len(lines):
-                            class_line = lines[i + 1].strip()
-                            if class_line.startswith("class "):
-                                class_name = (
-                                    class_line.split("class ")[1]
-                                    .split("(")[0]
-                                    .strip()
-                                    .split(":")[0]
-                                )
-                                key = "action" if match_action else "recognition"
-                                to_register[key].append(
-                                    {
-                                        "name": name,
-                                        "class_name": class_name,
-                                        "module_name": module_name,
-                                    }
-                                )
-            except Exception as e:
-                print(f"Error scanning {file_path}: {e}")
+        if self.lazy_agent:
+            # 保留 loader，供代理在首次调用时导入模块，close 时移除
+            self._agent_loader = loader
+            for key, proxy_cls, registry in (
+                ("recognition", LazyCustomRecognition, self._custom_recognitions),
+                ("action", LazyCustomAction, self._custom_actions),
+            ):
+                for item in to_register[key]:
+                    proxy = proxy_cls(
+                        item["name"],
+                        lambda item=item: getattr(
+                            importlib.import_module(item["module_name"]),
+                            item["class_name"],
+                        )(),
+                    )
+                    if key == "action":
+                        self.resource.register_custom_action(item["name"], proxy)
+                    else:
+                        self.resource.register_custom_recognition(item["name"], proxy)
+                    registry[item["name"]] = proxy
+            total = len(to_register["action"]) + len(to_register["recognition"])
+            self.send_log(f"已登记 {total} 个自定义组件，将在首次使用时加载")
+            return
 
         try:
             # 加载所有模块（支持循环/相互导入）
@@ -322,11 +531,15 @@ class MaaWorker:
                             cls = getattr(module, item["class_name"])
                             instance = cls()
                             if key == "action":
-                                resource.register_custom_action(item["name"], instance)
+                                self.resource.register_custom_action(
+                                    item["name"], instance
+                                )
+                                self._custom_actions[item["name"]] = instance
                             else:
-                                resource.register_custom_recognition(
+                                self.resource.register_custom_recognition(
                                     item["name"], instance
                                 )
+                                self._custom_recognitions[item["name"]] = instance
                     except Exception as e:
                         print(
                             f"Warning: Failed to register {key} '{item['name']}': {e}"
@@ -345,7 +558,9 @@ class MaaWorker:
                 "Agent解析错误，缺少child_args"
             )
             try:
+                started = time.perf_counter()
                 self.black_magic()
+                self.send_log(f"Agent冷启动耗时 {time.perf_counter() - started:.2f}s")
             except Exception as e:
                 self.send_log("黑魔法爆炸了！")
                 self.send_log(f"自定义Agent加载失败: {e}")
@@ -364,19 +579,34 @@ class MaaWorker:
                 self.send_log(f"Agent进程启动失败: {e}")
                 traceback.print_exc()
 
+    def close(self):
+        if self.agent_process:
+            self.agent_process.terminate()
+        if self._agent_loader in sys.meta_path:
+            sys.meta_path.remove(self._agent_loader)
+
+    def stop(self):
+        """请求终止任务，post_stop 会使正在等待的任务立即返回"""
+        self.stop_event.set()
+        self.tasker.post_stop()
+
     def run(self, task_list):
-        self.stop_flag = False
+        self.stop_event.clear()
         self.send_log("任务开始")
         try:
             for task in task_list:
+                if self.stop_event.is_set():
+                    break
                 t = self.tasker.post_task(task)
+                # stop() 可能在 post_task 之前执行，需要补发一次终止
+                if self.stop_event.is_set():
+                    self.tasker.post_stop()
                 self.send_log("正在运行任务: " + task)
-                while not t.done:
-                    time.sleep(0.5)
-                    if self.stop_flag:
-                        self.tasker.post_stop().wait()
-                        self.send_log("任务已终止")
-                        return
+                t.wait()
+            if self.stop_event.is_set():
+                self.tasker.post_stop().wait()
+                self.send_log("任务已终止")
+                return
         except Exception:
             traceback.print_exc()
             plyer.notification.notify(
@@ -388,18 +618,54 @@ class MaaWorker:
             self.send_log("任务出现异常，请检查终端日志")
             self.send_log(f"请将日志反馈至 {self.interface.github}/issues")
         self.send_log("所有任务完成")
-        time.sleep(0.5)
 
-    def get_screencap_bytes(self):
+    def get_screencap(self) -> np.ndarray | None:
         if not self.connected or not self.controller:
             return None
         try:
-            image = self.controller.post_screencap().wait().get()
-            if image is not None:
-                image_pil = Image.fromarray(image[:, :, ::-1])
-                img_byte_arr = io.BytesIO()
-                image_pil.save(img_byte_arr, format="JPEG")
-                return img_byte_arr.getvalue()
+            return self.controller.post_screencap().wait().get()
         except Exception as e:
             pass
         return None
+
+    def encode_frame(
+        self,
+        image: np.ndarray,
+        max_width: int | None = None,
+        quality: int | None = None,
+        fmt: Literal["jpeg", "webp"] = "jpeg",
+    ) -> bytes:
+        """将 BGR 截图编码为 JPEG 或 WebP，可按预览宽度缩放"""
+        height, width = image.shape[:2]
+        # 由解码器直接按 BGR 读取，避免 image[:, :, ::-1] 的跨步视图再被复制一次
+        image_pil = Image.frombuffer(
+            "RGB", (width, height), np.ascontiguousarray(image), "raw", "BGR", 0, 1
+        )
+        if max_width and width > max_width:
+            # 先按整数倍 reduce（块平均，开销远低于 BILINEAR），余下的比例用 NEAREST
+            factor = width // max_width
+            if factor >= 2:
+                image_pil = image_pil.reduce(factor)
+            if image_pil.width > max_width:
+                image_pil = image_pil.resize(
+                    (max_width, max(1, round(height * max_width / width))),
+                    Image.Resampling.NEAREST,
+                )
+        # 复用输出缓冲区，避免每帧重新分配
+        self._jpeg_buffer.seek(0)
+        self._jpeg_buffer.truncate()
+        if fmt == "webp":
+            image_pil.save(
+                self._jpeg_buffer,
+                format="WEBP",
+                quality=quality or self.jpeg_quality,
+                method=0,
+            )
+        else:
+            image_pil.save(
+                self._jpeg_buffer,
+                format="JPEG",
+                quality=quality or self.jpeg_quality,
+                subsampling=self.jpeg_subsampling,
+            )
+        return self._jpeg_buffer.getvalue()
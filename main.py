@@ -3,20 +3,29 @@ import json
 import threading
 import webbrowser
 from contextlib import asynccontextmanager
-from queue import SimpleQueue
+from datetime import datetime
+from typing import Literal
 import uvicorn
 import os
 import signal
 import sys
 import platform
-from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from models.interface import InterfaceModel
 from models.api import DeviceModel, UserConfig
 from models.settings import SettingsModel
 from models.scheduler import ScheduledTaskCreate, ScheduledTaskUpdate
-from maa_utils import MaaWorker
+from log_utils import SSE_HEARTBEAT, LogBroadcaster, LogClient
+from stream_utils import (
+    Frame,
+    FrameBroadcaster,
+    FrameFormat,
+    FRAME_HEADER,
+    FRAME_FORMAT_CODES,
+)
+from worker_pool import WorkerPool
 from scheduler_manager import SchedulerManager
 import httpx
 import subprocess
@@ -29,34 +38,10 @@ with open("interface.json", "r", encoding="utf-8") as f:
 interface = InterfaceModel(**json_data)
 
 
-class LogBroadcaster:
-    def __init__(self):
-        self._queues: list[asyncio.Queue] = []
-
-    def add_client(self, history: list[str]) -> asyncio.Queue:
-        q = asyncio.Queue()
-        for msg in history:
-            q.put_nowait(msg)
-        self._queues.append(q)
-        return q
-
-    def remove_client(self, q: asyncio.Queue):
-        if q in self._queues:
-            self._queues.remove(q)
-
-    async def broadcast(self, message: str):
-        for q in self._queues:
-            await q.put(message)
-
-
 class AppState:
     def __init__(self):
-        self.message_conn = SimpleQueue()
-        self.child_process = None
-        self.worker: MaaWorker | None = None
-        self.history_message = []
+        self.pool: WorkerPool | None = None
         self.current_status = None
-        self.broadcaster: LogBroadcaster | None = None
         self.scheduler_manager: SchedulerManager | None = None
         self.settings: SettingsModel | None = None
         self.subprocess_pipe: subprocess.Popen | None = None
@@ -67,40 +52,28 @@ class AppState:
 app_state = AppState()
 
 
-async def log_monitor():
-    while True:
-        while not app_state.message_conn.empty():
-            msg = app_state.message_conn.get_nowait()
-            app_state.history_message.append(msg)
-            if app_state.broadcaster:
-                await app_state.broadcaster.broadcast(msg)
-
-            if "所有任务完成" in msg:
-                if app_state.child_process:
-                    app_state.child_process.join()
-                    app_state.child_process = None
-
-        await asyncio.sleep(0.1)
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app_state.worker = MaaWorker(app_state.message_conn, interface)
-    app_state.broadcaster = LogBroadcaster()
     with open("config/settings.json", "r", encoding="utf-8") as f:
         config_data = json.load(f)
     app_state.settings = SettingsModel(**config_data)
+    app_state.pool = WorkerPool(
+        interface,
+        backend=app_state.settings.runtime.executionBackend,
+        lazy_agent=app_state.settings.runtime.lazyAgentLoading,
+    )
+    default_slot = await app_state.pool.get_or_create()
+    # 后台预加载默认资源，首次启动任务时无需再等待资源加载
+    if interface.resource:
+        default_slot.load_resource(interface.resource[0].name)
     # 初始化调度器
     app_state.scheduler_manager = SchedulerManager()
-    app_state.scheduler_manager.set_worker(app_state.worker)
+    app_state.scheduler_manager.set_slot(default_slot)
     await app_state.scheduler_manager.initialize()
 
-    monitor_task = asyncio.create_task(log_monitor())
     webbrowser.open_new("http://127.0.0.1:55666")
     yield
-    monitor_task.cancel()
-    if app_state.worker and app_state.worker.agent_process:
-        app_state.worker.agent_process.terminate()
+    app_state.pool.shutdown()
     # 关闭调度器
     if app_state.scheduler_manager:
         await app_state.scheduler_manager.shutdown()
@@ -133,40 +106,166 @@ def get_interface():
     return interface.model_dump()
 
 
-async def video_stream_generator(fps: int = 15):
+async def video_stream_generator(
+    broadcaster: FrameBroadcaster, fps: int = 15, width: int | None = None
+):
     fps = max(1, min(60, fps))
-    interval = 1.0 / fps
-
-    while True:
-        if app_state.worker and app_state.worker.connected:
-            frame_bytes = await asyncio.to_thread(app_state.worker.get_screencap_bytes)
-            if frame_bytes:
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
-                )
-                await asyncio.sleep(interval)
-                continue
-        await asyncio.sleep(0.5)
+    session = broadcaster.subscribe(fps, width)
+    loop = asyncio.get_running_loop()
+
+    try:
+        last_seq = 0
+        while True:
+            try:
+                frame = await broadcaster.next_frame(last_seq)
+            except ValueError:
+                break
+            last_seq = frame.seq
+            frame_bytes = frame.data["jpeg"]
+            sent_at = loop.time()
+            yield (
+                b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n"
+            )
+            # 发送耗时包含客户端的背压，据此调整该连接的帧率与画质
+            session.record(
+                len(frame_bytes),
+                broadcaster.capture_time,
+                broadcaster.encode_time,
+                loop.time() - sent_at,
+            )
+            # 按自身帧率节流，期间产生的旧帧直接跳过
+            await asyncio.sleep(max(0.0, 1.0 / session.fps - (loop.time() - sent_at)))
+    finally:
+        broadcaster.unsubscribe(session)
 
 
 @app.get("/api/stream/live")
-async def stream_live(fps: int = 15):
+async def stream_live(
+    fps: int = 15, width: int | None = None, device_id: str | None = None
+):
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        return {"status": "failed", "message": "设备不存在"}
     return StreamingResponse(
-        video_stream_generator(fps),
+        video_stream_generator(slot.frame_broadcaster, fps, width),
         media_type="multipart/x-mixed-replace; boundary=frame",
     )
 
 
+@app.websocket("/api/ws/live")
+async def ws_live(
+    websocket: WebSocket,
+    fps: int = 15,
+    width: int | None = None,
+    format: FrameFormat = "jpeg",
+    window: int = 2,
+    device_id: str | None = None,
+):
+    """
+    WebSocket 实时预览
+    每条二进制消息为 FRAME_HEADER + 图像数据；客户端回复 {"ack": 序号} 确认，
+    未确认的帧超过 window 时暂停发送
+    """
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        await websocket.close(code=1008, reason="设备不存在")
+        return
+    await websocket.accept()
+    fps = max(1, min(60, fps))
+    window = max(1, window)
+    broadcaster = slot.frame_broadcaster
+    session = broadcaster.subscribe(fps, width, format)
+    loop = asyncio.get_running_loop()
+    in_flight: dict[int, tuple[float, int, Frame]] = {}  # 序号 -> (发送时间, 大小, 帧)
+    acked = asyncio.Event()
+
+    async def receive_acks():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # 非 JSON 文本或二进制消息，忽略
+                continue
+            ack = message.get("ack") if isinstance(message, dict) else None
+            # bool 是 int 的子类，{"ack": true} 不应确认序号 1
+            if not isinstance(ack, int) or isinstance(ack, bool):
+                continue
+            # 累计确认：小于等于 ack 的帧均视为已送达
+            for seq in [seq for seq in in_flight if seq <= ack]:
+                sent_at, size, frame = in_flight.pop(seq)
+                if seq == ack:
+                    session.record(
+                        size,
+                        broadcaster.capture_time,
+                        frame.encode_time,
+                        loop.time() - sent_at,
+                    )
+            acked.set()
+
+    async def send_frames():
+        last_seq = 0
+        while True:
+            while len(in_flight) >= window:
+                acked.clear()
+                await acked.wait()
+            try:
+                frame = await broadcaster.next_frame(last_seq, format)
+            except ValueError as e:
+                # 1003：不支持的数据格式
+                await websocket.close(code=1003, reason=str(e))
+                return
+            last_seq = frame.seq
+            data = frame.data[format]
+            header = FRAME_HEADER.pack(
+                FRAME_FORMAT_CODES[format],
+                frame.seq,
+                frame.captured_at,
+                frame.encode_time * 1000,
+            )
+            sent_at = loop.time()
+            in_flight[frame.seq] = (sent_at, len(data), frame)
+            await websocket.send_bytes(header + data)
+            await asyncio.sleep(max(0.0, 1.0 / session.fps - (loop.time() - sent_at)))
+
+    tasks = [asyncio.create_task(receive_acks()), asyncio.create_task(send_frames())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # 断开连接属于正常结束，其余异常继续抛出
+            if task.exception() and not isinstance(
+                task.exception(), WebSocketDisconnect
+            ):
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcaster.unsubscribe(session)
+
+
+@app.get("/api/stream/stats")
+def get_stream_stats(device_id: str | None = None):
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        return {"status": "failed", "message": "设备不存在"}
+    return {"status": "success", "streams": slot.frame_broadcaster.stats()}
+
+
+@app.get("/api/workers")
+def get_workers():
+    return {"status": "success", "workers": [s.info() for s in app_state.pool.slots()]}
+
+
 @app.get("/api/device")
 def get_device():
-    devices = app_state.worker.get_device()
+    devices = app_state.pool.get().worker.get_device()
     return {"status": "success", "devices": devices}
 
 
 @app.post("/api/device")
-def connect_device(device: DeviceModel):
-    if app_state.worker.connect_device(device):
+async def connect_device(device: DeviceModel, device_id: str | None = None):
+    # 指定 device_id（通常为设备地址）时为该设备创建独立的 Worker
+    slot = await app_state.pool.get_or_create(device_id)
+    if await asyncio.to_thread(slot.worker.connect_device, device):
         return {"status": "success"}
     return {"status": "failed"}
 
@@ -177,12 +276,14 @@ def get_resource():
 
 
 @app.post("/api/resource")
-def set_resource(name: str):
+async def set_resource(name: str, device_id: str | None = None):
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        return {"status": "failed", "message": "设备不存在"}
     # 设置资源
-    try:
-        app_state.worker.set_resource(name)
-    except Exception as e:
-        return {"status": "failed", "message": str(e)}
+    slot.load_resource(name)
+    if not await slot.wait_resource():
+        return {"status": "failed", "message": slot.resource_status.get("message")}
     return {"status": "success"}
 
 
@@ -404,58 +505,71 @@ def system_shutdown():
 
 @app.post("/api/test-notification")
 def test_notification():
-    if app_state.worker is None:
+    slot = app_state.pool.get() if app_state.pool else None
+    if slot is None:
         return {"status": "failed", "message": "Worker未初始化"}
     try:
-        app_state.worker.send_notification("测试通知", "这是一条测试通知。")
+        slot.worker.send_notification("测试通知", "这是一条测试通知。")
         return {"status": "success"}
     except Exception as e:
         return {"status": "failed", "message": str(e)}
 
 
 @app.post("/api/start")
-def start(tasks: list[str], options: dict[str, str]):
-    if app_state.child_process is not None:
+async def start(
+    tasks: list[str], options: dict[str, str], device_id: str | None = None
+):
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        return {"status": "failed", "message": "设备不存在"}
+    if slot.running:
         return {"status": "failed", "message": "任务已开始"}
-    if not app_state.worker.connected:
+    if not slot.worker.connected:
         return {"status": "failed", "message": "请先连接设备"}
-    # 设置选项
-    for name, case in options.items():
-        app_state.worker.set_option(name, case)
-    app_state.child_process = threading.Thread(
-        target=app_state.worker.run, args=(tasks,), daemon=True
-    )
-    app_state.child_process.start()
+    # 等待预加载或切换中的资源；资源加载同样持有 run_lock，需在加锁前等待
+    if not await slot.wait_resource():
+        return {"status": "failed", "message": "资源加载失败"}
+    # 与定时任务互斥地完成 检查 -> 设置选项 -> 启动，避免选项被另一方覆盖
+    async with slot.run_lock:
+        if slot.running:
+            return {"status": "failed", "message": "任务已开始"}
+        # 设置选项
+        await asyncio.to_thread(slot.worker.apply_options, options)
+        slot.start_run(tasks)
     return {"status": "success"}
 
 
 @app.post("/api/stop")
-def stop():
-    if app_state.child_process is None or app_state.worker is None:
+def stop(device_id: str | None = None):
+    slot = app_state.pool.get(device_id)
+    if slot is None or not slot.running:
         return {"status": "failed", "message": "任务未开始"}
-    app_state.worker.stop_flag = True
-    app_state.child_process = None
+    # child_process 保留到线程真正结束，由日志监控或定时任务清理，
+    # 避免终止过程中 running 提前变为 False 而启动新的任务
+    slot.stop_run()
     return {"status": "success"}
 
 
-@app.get("/api/logs")
-async def stream_logs(request: Request):
-    q = app_state.broadcaster.add_client(app_state.history_message)
+def sse_response(broadcaster: LogBroadcaster, client: LogClient) -> StreamingResponse:
+    """将订阅者队列输出为 SSE 响应，断开时自动取消订阅"""
 
     async def event_generator():
         try:
             while True:
-                if await request.is_disconnected():
-                    break
                 try:
-                    data = await asyncio.wait_for(q.get(), timeout=1.0)
-                    yield f"data: {json.dumps({'type': 'log', 'message': data}, ensure_ascii=False)}\n\n"
+                    item = await asyncio.wait_for(client.queue.get(), timeout=15)
                 except asyncio.TimeoutError:
+                    # 空闲时发送注释心跳，保持连接并及时发现断开
+                    yield SSE_HEARTBEAT
                     continue
+                if item is None:
+                    break
+                client.last_seq, frame = item
+                yield frame
         except asyncio.CancelledError:
             pass
         finally:
-            app_state.broadcaster.remove_client(q)
+            broadcaster.remove_client(client)
 
     return StreamingResponse(
         event_generator(),
@@ -468,19 +582,69 @@ async def stream_logs(request: Request):
     )
 
 
+@app.get("/api/logs")
+async def stream_logs(
+    request: Request, last_event_id: int | None = None, device_id: str | None = None
+):
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        return {"status": "failed", "message": "设备不存在"}
+    # 浏览器自动重连时通过请求头携带，手动重连时通过查询参数携带
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+    client = slot.broadcaster.add_client(slot.history_message.since(last_event_id))
+    return sse_response(slot.broadcaster, client)
+
+
+@app.get("/api/logs/clients")
+def get_log_clients(device_id: str | None = None):
+    slot = app_state.pool.get(device_id)
+    if slot is None:
+        return {"status": "failed", "message": "设备不存在"}
+    return {"status": "success", "clients": slot.broadcaster.stats()}
+
+
 # ==================== 调度器 API ====================
 
 
+@app.get("/api/scheduler/events")
+async def stream_scheduler_events():
+    """定时任务与执行状态的 SSE 推送"""
+    if app_state.scheduler_manager is None:
+        return {"status": "failed", "message": "调度器未初始化"}
+    broadcaster = app_state.scheduler_manager.events
+    return sse_response(broadcaster, broadcaster.add_client([]))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """按 RFC 9110 的弱比较判断 If-None-Match 是否命中：逐个标签比较，忽略 W/ 前缀"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
 @app.get("/api/scheduler/tasks")
-async def get_scheduler_tasks():
-    """获取所有定时任务"""
+async def get_scheduler_tasks(request: Request):
+    """获取所有定时任务，任务未变化时按 If-None-Match 返回 304"""
     if app_state.scheduler_manager is None:
         return {"status": "failed", "message": "调度器未初始化"}
     try:
-        tasks = await app_state.scheduler_manager.get_all_tasks()
-        return {"status": "success", "tasks": [task.model_dump() for task in tasks]}
+        body, etag = app_state.scheduler_manager.get_tasks_payload()
     except Exception as e:
         return {"status": "failed", "message": str(e)}
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @app.post("/api/scheduler/tasks")
@@ -551,15 +715,33 @@ async def resume_scheduler_task(task_id: str):
         return {"status": "failed", "message": str(e)}
 
 
+@app.get("/api/scheduler/queue")
+def get_scheduler_queue():
+    """获取排队中的定时任务执行"""
+    if app_state.scheduler_manager is None:
+        return {"status": "failed", "message": "调度器未初始化"}
+    return {"status": "success", "queue": app_state.scheduler_manager.get_queue()}
+
+
 @app.get("/api/scheduler/executions")
-async def get_scheduler_executions(limit: int = 50):
-    """获取执行历史"""
+async def get_scheduler_executions(
+    limit: int = 50,
+    offset: int = 0,
+    status: Literal["queued", "running", "success", "failed", "stopped"] | None = None,
+    task_id: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    """分页获取执行历史，可按状态、任务和开始时间范围 [start, end) 筛选"""
     if app_state.scheduler_manager is None:
         return {"status": "failed", "message": "调度器未初始化"}
     try:
-        executions = await app_state.scheduler_manager.get_executions(limit)
+        total, executions = await app_state.scheduler_manager.get_executions(
+            max(1, min(500, limit)), max(0, offset), status, task_id, start, end
+        )
         return {
             "status": "success",
+            "total": total,
             "executions": [exec.model_dump() for exec in executions],
         }
     except Exception as e:
@@ -46,6 +46,7 @@ class ScheduledTask(BaseModel):
     trigger_config: TriggerConfig = Field(..., description="触发器配置")
     task_list: List[str] = Field(..., min_items=1, description="要执行的任务列表")
     task_options: Dict[str, str] = Field(default_factory=dict, description="任务选项")
+    priority: int = Field(0, ge=0, le=100, description="优先级，数值越大越先执行")
     next_run_time: Optional[datetime] = Field(None, description="下次执行时间")
     created_at: datetime = Field(default_factory=datetime.now, description="创建时间")
     updated_at: datetime = Field(default_factory=datetime.now, description="更新时间")
@@ -61,6 +62,7 @@ class ScheduledTaskCreate(BaseModel):
     trigger_config: TriggerConfig
     task_list: List[str] = Field(..., min_items=1)
     task_options: Dict[str, str] = Field(default_factory=dict)
+    priority: int = Field(0, ge=0, le=100)
 
 
 class ScheduledTaskUpdate(BaseModel):
@@ -73,6 +75,7 @@ class ScheduledTaskUpdate(BaseModel):
     trigger_config: Optional[TriggerConfig] = None
     task_list: Optional[List[str]] = Field(None, min_items=1)
     task_options: Optional[Dict[str, str]] = None
+    priority: Optional[int] = Field(None, ge=0, le=100)
 
 
 class TaskExecution(BaseModel):
@@ -83,7 +86,7 @@ class TaskExecution(BaseModel):
     task_name: str = Field(..., description="任务名称")
     started_at: datetime = Field(..., description="开始时间")
     finished_at: Optional[datetime] = Field(None, description="结束时间")
-    status: Literal["running", "success", "failed", "stopped"] = Field(
+    status: Literal["queued", "running", "success", "failed", "stopped"] = Field(
         ..., description="执行状态"
     )
     error_message: Optional[str] = Field(None, description="错误信息")
@@ -94,5 +97,5 @@ class TaskExecutionCreate(BaseModel):
 
     task_id: str
     task_name: str
-    status: Literal["running", "success", "failed", "stopped"]
+    status: Literal["queued", "running", "success", "failed", "stopped"]
     error_message: Optional[str] = None
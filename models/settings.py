@@ -34,6 +34,8 @@ class Runtime(BaseModel):
     reminderInterval: int
     autoRetry: bool
     maxRetryCount: int
+    executionBackend: Literal["thread", "process"] = "thread"
+    lazyAgentLoading: bool = False
 
 
 class About(BaseModel):
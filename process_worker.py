@@ -0,0 +1,216 @@
+import io
+import itertools
+import multiprocessing
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Connection
+
+import numpy as np
+
+from log_utils import LogBridge
+from maa_utils import MaaWorker
+from models.interface import InterfaceModel
+from stream_utils import FrameRing
+
+
+# 等待子进程返回的默认超时（秒），run 等长时间调用不受限制
+CALL_TIMEOUT = 300
+
+
+class _PipeLogQueue:
+    """子进程内的日志队列，经管道回传主进程"""
+
+    def __init__(self, conn: Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+
+    def put(self, msg: str):
+        with self._lock:
+            self._conn.send(("log", msg))
+
+
+def _serve(
+    conn: Connection, interface: InterfaceModel, ring_name: str, lazy_agent: bool
+):
+    """子进程入口：持有真正的 MaaWorker，按请求调用其方法"""
+    lock = threading.Lock()
+    worker = MaaWorker(_PipeLogQueue(conn, lock), interface, lazy_agent)
+    ring = FrameRing(ring_name)
+
+    def get_screencap_shared():
+        """截图写入共享内存帧环，只回传序号；放不下时退回管道传输"""
+        image = worker.get_screencap()
+        if image is None:
+            return None
+        seq = ring.write(image)
+        if seq is None:
+            return "array", image
+        return "shared", seq
+
+    handlers = {"get_screencap_shared": get_screencap_shared}
+    # run 会长时间阻塞，stop 等请求需要并发处理
+    executor = ThreadPoolExecutor()
+
+    def handle(call_id: int, method: str, args: tuple):
+        try:
+            handler = handlers.get(method) or getattr(worker, method)
+            reply = ("result", call_id, True, handler(*args))
+        except Exception as e:
+            traceback.print_exc()
+            reply = ("result", call_id, False, f"{type(e).__name__}: {e}")
+        with lock:
+            conn.send(reply)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        executor.submit(handle, *request)
+    executor.shutdown(wait=False, cancel_futures=True)
+    worker.close()
+    ring.close()
+
+
+class ProcessWorker:
+    """
+    进程隔离的 MaaWorker 代理
+    MaaWorker 运行在独立子进程中，方法调用、返回值与日志经由管道往返，
+    识别负载不再与事件循环争抢 GIL，原生崩溃也不会拖垮 Web 服务
+    """
+
+    # 预览编码在主进程完成，直接复用 MaaWorker 的实现
+    encode_frame = MaaWorker.encode_frame
+
+    def __init__(
+        self, queue: LogBridge, interface: InterfaceModel, lazy_agent: bool = False
+    ):
+        self.interface = interface
+        self.queue = queue
+        self.connected = False
+        self.jpeg_quality = 75
+        self.jpeg_subsampling = 2
+        self._jpeg_buffer = io.BytesIO()
+        self._ids = itertools.count(1)
+        self._pending: dict[int, Future] = {}
+        # 保护 _pending 与 _exited，避免调用方在读线程清理后才登记 Future
+        self._pending_lock = threading.Lock()
+        self._exited = False
+        self._send_lock = threading.Lock()
+        # 截图经共享内存传回，避免整帧 pickle
+        self._ring = FrameRing()
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve,
+            args=(child_conn, interface, self._ring.name, lazy_agent),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        while True:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "log":
+                self.queue.put(message[1])
+            else:
+                _, call_id, ok, value = message
+                with self._pending_lock:
+                    future = self._pending.pop(call_id, None)
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(value))
+        # 子进程退出（包括原生崩溃），让所有等待中的调用立即失败
+        self.connected = False
+        with self._pending_lock:
+            self._exited = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.set_exception(RuntimeError("任务进程已退出"))
+        self._process.join(timeout=1)
+        if self._process.exitcode not in (None, 0):
+            self.queue.put(f"任务进程异常退出，退出码 {self._process.exitcode}")
+
+    def _call(self, method: str, *args, timeout: float | None = CALL_TIMEOUT):
+        call_id = next(self._ids)
+        future = Future()
+        with self._pending_lock:
+            if self._exited:
+                raise RuntimeError("任务进程已退出")
+            self._pending[call_id] = future
+        try:
+            with self._send_lock:
+                self._conn.send((call_id, method, args))
+        except (OSError, ValueError) as e:
+            with self._pending_lock:
+                self._pending.pop(call_id, None)
+            raise RuntimeError("任务进程已退出") from e
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            with self._pending_lock:
+                self._pending.pop(call_id, None)
+            raise RuntimeError(f"任务进程响应超时: {method}") from None
+
+    def send_notification(self, title, message):
+        return self._call("send_notification", title, message)
+
+    def get_device(self) -> dict:
+        return self._call("get_device")
+
+    def connect_device(self, device) -> bool:
+        self.connected = self._call("connect_device", device)
+        return self.connected
+
+    def set_resource(self, resource_name):
+        return self._call("set_resource", resource_name)
+
+    def set_option(self, option_name: str, case_name: str):
+        return self._call("set_option", option_name, case_name)
+
+    def apply_options(self, options: dict[str, str]):
+        return self._call("apply_options", options)
+
+    def stop(self):
+        return self._call("stop")
+
+    def run(self, task_list):
+        # 任务链可能运行数小时，不设超时
+        return self._call("run", task_list, timeout=None)
+
+    def get_screencap(self) -> np.ndarray | None:
+        """返回共享内存上的只读视图，需在下一次截图前用完"""
+        try:
+            result = self._call("get_screencap_shared")
+        except RuntimeError:
+            return None
+        if result is None:
+            return None
+        kind, value = result
+        if kind == "shared":
+            return self._ring.read(value)
+        return value
+
+    def close(self):
+        try:
+            with self._send_lock:
+                self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._ring.close()
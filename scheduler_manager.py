@@ -1,17 +1,35 @@
 import asyncio
+import hashlib
+import heapq
+import itertools
 import json
 import logging
-import threading
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List, Dict, Literal
 
+from apscheduler.events import (
+    EVENT_ALL_JOBS_REMOVED,
+    EVENT_JOB_ADDED,
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_MODIFIED,
+    EVENT_JOB_REMOVED,
+    JobEvent,
+    JobExecutionEvent,
+)
+from apscheduler.job import Job
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
+from execution_store import ExecutionStore
+from log_utils import LogBroadcaster
 from models.scheduler import (
     ScheduledTask,
     ScheduledTaskCreate,
@@ -26,34 +44,179 @@ from models.scheduler import (
 
 logger = logging.getLogger(__name__)
 
+# 定时任务持久化数据库
+SCHEDULER_DB = "config/scheduler.db"
+# 任务记录（job kwargs）的结构版本，结构变化时递增并在 _upgrade_kwargs 中迁移
+TASK_SCHEMA_VERSION = 2
+# 错过执行时间后仍允许补执行的秒数（如程序关闭期间到期的任务）
+MISFIRE_GRACE_TIME = 3600
+
+# 执行队列的最大长度，超出时丢弃新的触发
+MAX_QUEUE_DEPTH = 20
+# 排队超过该秒数的执行视为过期，出队时直接放弃
+QUEUE_DEADLINE = 3600
+# 执行记录状态 -> 推送的事件名
+_EXECUTION_EVENTS = {
+    "queued": "submitted",
+    "running": "started",
+    "success": "executed",
+    "failed": "failed",
+    "stopped": "stopped",
+}
+
+_manager: Optional["SchedulerManager"] = None
+
+
+async def run_scheduled_task(
+    task_id: str,
+    task_list: List[str],
+    options: Dict[str, str],
+    priority: int = 0,
+    **_,
+):
+    """
+    定时任务入口
+    持久化的任务以 模块:函数 的形式引用入口，因此不能使用实例方法
+    """
+    if _manager is None:
+        logger.error(f"调度器未初始化，无法执行定时任务 {task_id}")
+        return
+    await _manager._execute_task(task_id, task_list, options, priority)
+
+
+class _QueuedRun:
+    """排队中的一次定时任务执行"""
+
+    def __init__(
+        self,
+        execution_id: str,
+        task_id: str,
+        task_list: List[str],
+        options: Dict[str, str],
+        priority: int,
+    ):
+        self.execution_id = execution_id
+        self.task_id = task_id
+        self.task_list = task_list
+        self.options = options
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
 
 class SchedulerManager:
     """调度器管理器"""
 
-    def __init__(self):
+    def __init__(self, db_path: str = SCHEDULER_DB):
         self.scheduler: Optional[AsyncIOScheduler] = None
-        self._worker = None
-        self._executions: List[TaskExecution] = []
-        self._executions_lock = asyncio.Lock()
-
-    def set_worker(self, worker):
-        """设置 MaaWorker 实例"""
-        self._worker = worker
+        self._db_path = Path(db_path)
+        self._slot = None
+        # 执行队列：(-优先级, 入队序号, 执行)，同一任务最多排队一次
+        self._queue: List[tuple[int, int, _QueuedRun]] = []
+        self._queued: Dict[str, _QueuedRun] = {}
+        self._queue_seq = itertools.count()
+        self._queue_event = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        # 执行记录与任务共用同一个数据库文件
+        self._executions = ExecutionStore(db_path)
+        # 任务索引与序列化后的列表响应 (body, etag)，任务变化时失效
+        self._tasks: Dict[str, ScheduledTask] = {}
+        self._tasks_payload: Optional[tuple[bytes, str]] = None
+        # 任务与执行状态变化的 SSE 推送，只推送当前状态，断线重连后由客户端重新拉取
+        self.events = LogBroadcaster(maxsize=100)
+
+    def set_slot(self, slot):
+        """设置执行定时任务的设备（WorkerSlot），与手动启动的任务共用运行状态"""
+        self._slot = slot
 
     async def initialize(self):
         """初始化调度器"""
-        # 创建调度器
-        self.scheduler = AsyncIOScheduler()
-
-        # 启动调度器
-        self.scheduler.start()
-        logger.info("调度器已启动")
+        global _manager
+        _manager = self
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        await self._executions.open()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        # 创建调度器，任务保存在 SQLite 中，重启后直接从数据库恢复，无需重新创建
+        self.scheduler = AsyncIOScheduler(
+            jobstores={"default": SQLAlchemyJobStore(url=f"sqlite:///{self._db_path}")},
+            job_defaults={"coalesce": True, "misfire_grace_time": MISFIRE_GRACE_TIME},
+        )
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
+
+        # 先以暂停状态启动，迁移旧结构的任务记录后再开始处理到期任务
+        self.scheduler.start(paused=True)
+        total, upgraded = self._upgrade_jobs()
+        # 建立任务索引，之后由调度器事件增量维护
+        self._tasks = {
+            job.id: self._task_from_job(job) for job in self.scheduler.get_jobs()
+        }
+        self._tasks_payload = None
+        self.scheduler.add_listener(
+            self._on_job_event,
+            EVENT_JOB_ADDED
+            | EVENT_JOB_MODIFIED
+            | EVENT_JOB_REMOVED
+            | EVENT_ALL_JOBS_REMOVED
+            | EVENT_JOB_EXECUTED
+            | EVENT_JOB_ERROR
+            | EVENT_JOB_MISSED,
+        )
+        self.scheduler.resume()
+        logger.info(f"调度器已启动，恢复 {total} 个定时任务，迁移 {upgraded} 个")
 
     async def shutdown(self):
         """关闭调度器"""
+        global _manager
         if self.scheduler:
             self.scheduler.shutdown()
             logger.info("调度器已关闭")
+        if self._dispatcher:
+            self._dispatcher.cancel()
+        await self._executions.close()
+        _manager = None
+
+    @staticmethod
+    def _upgrade_kwargs(kwargs: dict) -> dict:
+        """将旧版本的任务记录迁移到当前结构"""
+        kwargs = dict(kwargs)
+        if kwargs.get("schema_version", 0) < 1:
+            now = datetime.now()
+            kwargs.setdefault("description", "")
+            kwargs.setdefault("created_at", now)
+            kwargs.setdefault("updated_at", now)
+        if kwargs.get("schema_version", 0) < 2:
+            kwargs.setdefault("priority", 0)
+        kwargs["schema_version"] = TASK_SCHEMA_VERSION
+        return kwargs
+
+    def _upgrade_jobs(self) -> tuple[int, int]:
+        """只改写结构版本落后的任务，其余任务保持原样，返回 (任务总数, 迁移数)"""
+        upgraded = 0
+        jobs = self.scheduler.get_jobs()
+        for job in jobs:
+            if job.kwargs.get("schema_version", 0) < TASK_SCHEMA_VERSION:
+                self.scheduler.modify_job(
+                    job.id,
+                    func=run_scheduled_task,
+                    kwargs=self._upgrade_kwargs(job.kwargs),
+                )
+                upgraded += 1
+        return len(jobs), upgraded
+
+    def _on_job_missed(self, event: JobExecutionEvent):
+        logger.warning(
+            f"定时任务 {event.job_id} 错过执行时间 {event.scheduled_run_time}，已跳过"
+        )
+        # 监听器在事件循环中同步调用，记录写入交给后台任务
+        execution = TaskExecution(
+            id=str(uuid.uuid4()),
+            task_id=event.job_id,
+            task_name=self._get_task_name(event.job_id),
+            started_at=event.scheduled_run_time,
+            finished_at=datetime.now(),
+            status="stopped",
+            error_message="错过执行时间",
+        )
+        asyncio.get_running_loop().create_task(self._add_execution(execution))
 
     def _create_trigger(self, trigger_config: TriggerConfig):
         """根据配置创建触发器"""
@@ -86,93 +249,264 @@ class SchedulerManager:
             raise ValueError(f"未知的触发器类型: {type(trigger_config)}")
 
     async def _execute_task(
-        self, task_id: str, task_list: List[str], options: Dict[str, str]
+        self,
+        task_id: str,
+        task_list: List[str],
+        options: Dict[str, str],
+        priority: int = 0,
     ):
-        """执行定时任务"""
-        logger.info(f"开始执行定时任务: {task_id}")
+        """定时任务触发：加入执行队列，由调度循环依次执行"""
+        logger.info(f"定时任务触发: {task_id}")
+        # 触发时调度器已写入下次执行时间，但不会发出 JOB_MODIFIED
+        self._refresh_task(task_id)
 
         # 创建执行记录
         execution_id = str(uuid.uuid4())
-        task_name = self._get_task_name(task_id)
         execution = TaskExecution(
             id=execution_id,
             task_id=task_id,
-            task_name=task_name,
+            task_name=self._get_task_name(task_id),
             started_at=datetime.now(),
-            status="running",
+            status="queued",
             finished_at=None,
             error_message=None,
         )
         await self._add_execution(execution)
 
+        queued = self._queued.get(task_id)
+        if queued is not None:
+            # 同一任务已在排队：合并为一次执行，使用最新的任务配置
+            queued.task_list = task_list
+            queued.options = options
+            self._reprioritize(queued, priority)
+            logger.info(f"定时任务 {task_id} 已在排队，合并本次触发")
+            await self._update_execution_status(
+                execution_id, "stopped", "已与排队中的同一任务合并"
+            )
+            return
+        if len(self._queue) >= MAX_QUEUE_DEPTH:
+            logger.warning(f"执行队列已满，丢弃定时任务 {task_id}")
+            await self._update_execution_status(execution_id, "stopped", "执行队列已满")
+            return
+
+        run = _QueuedRun(execution_id, task_id, task_list, options, priority)
+        heapq.heappush(self._queue, (-priority, next(self._queue_seq), run))
+        self._queued[task_id] = run
+        self._queue_event.set()
+
+    def _reprioritize(self, run: "_QueuedRun", priority: int):
+        """修改排队中执行的优先级；队列很短，直接重建堆，同优先级仍按入队顺序"""
+        if run.priority == priority:
+            return
+        run.priority = priority
+        self._queue = [(-r.priority, seq, r) for _, seq, r in self._queue]
+        heapq.heapify(self._queue)
+
+    async def _wait_idle(self):
+        """等待设备上当前的任务（包括手动启动的任务）结束"""
+        while self._slot is not None and self._slot.running:
+            thread = self._slot.child_process
+            if thread is not None:
+                await asyncio.to_thread(thread.join)
+
+    async def _dispatch_loop(self):
+        """唯一的调度循环：按优先级依次取出排队的执行并交给 Worker"""
+        while True:
+            while not self._queue:
+                self._queue_event.clear()
+                await self._queue_event.wait()
+            # 单次出错不能结束调度循环，否则之后的触发会一直排队
+            try:
+                await self._dispatch_next()
+            except Exception as e:
+                logger.error(f"调度执行队列出错: {e}")
+                await asyncio.sleep(1)
+
+    async def _dispatch_next(self):
+        # 先等待空闲再出队，等待期间到达的高优先级任务可以插队
+        await self._wait_idle()
+        _, _, run = heapq.heappop(self._queue)
+        self._queued.pop(run.task_id, None)
+        if time.monotonic() - run.enqueued_at > QUEUE_DEADLINE:
+            logger.warning(f"定时任务 {run.task_id} 排队超时，已放弃")
+            await self._update_execution_status(run.execution_id, "stopped", "排队超时")
+            return
+        await self._run(run)
+
+    async def _run(self, run: "_QueuedRun"):
+        """执行一次出队的定时任务并等待完成"""
+        slot = self._slot
         try:
-            # 检查是否有任务正在运行
-            if self._worker and self._worker.child_process is not None:
-                logger.warning(f"任务已在运行，跳过定时任务 {task_id}")
+            # 检查设备是否已连接
+            if slot is None or not slot.worker.connected:
+                logger.error(f"设备未连接，无法执行定时任务 {run.task_id}")
                 await self._update_execution_status(
-                    execution_id, "stopped", "任务已在运行"
+                    run.execution_id, "failed", "设备未连接"
                 )
                 return
-
-            # 检查设备是否已连接
-            if not self._worker or not self._worker.connected:
-                logger.error(f"设备未连接，无法执行定时任务 {task_id}")
+            if not await slot.wait_resource():
                 await self._update_execution_status(
-                    execution_id, "failed", "设备未连接"
+                    run.execution_id, "failed", "资源加载失败"
                 )
                 return
 
-            # 设置选项
-            for name, case in options.items():
-                self._worker.set_option(name, case)
-
-            # 启动任务
-            self._worker.child_process = threading.Thread(
-                target=self._worker.run, args=(task_list,), daemon=True
-            )
-            self._worker.child_process.start()
+            # 与 /api/start 互斥地设置选项并启动；已有任务运行时先在锁外等其结束
+            while True:
+                await self._wait_idle()
+                async with slot.run_lock:
+                    if slot.running:
+                        continue
+                    await asyncio.to_thread(slot.worker.apply_options, run.options)
+                    thread = slot.start_run(run.task_list)
+                    break
+            await self._executions.mark_running(run.execution_id, datetime.now())
+            execution = await self._executions.get(run.execution_id)
+            if execution is not None:
+                self._publish_execution(execution)
+            logger.info(f"开始执行定时任务: {run.task_id}")
 
             # 等待任务完成
-            while self._worker.child_process and self._worker.child_process.is_alive():
-                await asyncio.sleep(1)
+            await asyncio.to_thread(thread.join)
+            if slot.child_process is thread:
+                slot.child_process = None
 
-            await self._update_execution_status(execution_id, "success")
-            logger.info(f"定时任务 {task_id} 执行成功")
+            if slot.was_stopped(thread):
+                await self._update_execution_status(
+                    run.execution_id, "stopped", "任务被手动终止"
+                )
+                logger.info(f"定时任务 {run.task_id} 已被终止")
+                return
+            await self._update_execution_status(run.execution_id, "success")
+            logger.info(f"定时任务 {run.task_id} 执行成功")
 
         except Exception as e:
-            logger.error(f"定时任务 {task_id} 执行失败: {e}")
-            await self._update_execution_status(execution_id, "failed", str(e))
+            logger.error(f"定时任务 {run.task_id} 执行失败: {e}")
+            await self._update_execution_status(run.execution_id, "failed", str(e))
+
+    def get_queue(self) -> List[dict]:
+        """当前排队中的执行，按出队顺序排列"""
+        now = time.monotonic()
+        return [
+            {
+                "execution_id": run.execution_id,
+                "task_id": run.task_id,
+                "task_name": self._get_task_name(run.task_id),
+                "priority": run.priority,
+                "waited": round(now - run.enqueued_at, 1),
+            }
+            for _, _, run in sorted(self._queue)
+        ]
 
     def _get_task_name(self, task_id: str) -> str:
         """获取任务名称"""
-        if not self.scheduler:
-            return task_id
-        job = self.scheduler.get_job(task_id)
-        return job.kwargs.get("task_name", task_id) if job else task_id
+        task = self._tasks.get(task_id)
+        return task.name if task else task_id
+
+    @staticmethod
+    def _trigger_config_from_kwargs(kwargs: dict) -> TriggerConfig:
+        """根据触发器类型从任务记录重建触发器配置对象"""
+        trigger_type = kwargs.get("trigger_type", "cron")
+        trigger_config_dict = kwargs.get("trigger_config", {})
+        if trigger_type == "cron":
+            return CronTriggerConfig(**trigger_config_dict)
+        elif trigger_type == "date":
+            return DateTriggerConfig(**trigger_config_dict)
+        elif trigger_type == "interval":
+            return IntervalTriggerConfig(**trigger_config_dict)
+        return CronTriggerConfig(cron="* * * * *")
+
+    @classmethod
+    def _task_from_job(cls, job: Job) -> ScheduledTask:
+        """从调度器任务的 kwargs 构建 ScheduledTask"""
+        kwargs = job.kwargs
+        return ScheduledTask(
+            id=job.id,
+            name=kwargs.get("task_name", job.id),
+            description=kwargs.get("description", ""),
+            enabled=job.next_run_time is not None,
+            trigger_type=kwargs.get("trigger_type", "cron"),
+            trigger_config=cls._trigger_config_from_kwargs(kwargs),
+            task_list=kwargs.get("task_list", []),
+            task_options=kwargs.get("options", {}),
+            priority=kwargs.get("priority", 0),
+            next_run_time=job.next_run_time,
+            created_at=kwargs.get("created_at", datetime.now()),
+            updated_at=kwargs.get("updated_at", datetime.now()),
+        )
+
+    def _refresh_task(self, task_id: str):
+        """按任务当前状态更新索引中的单个条目"""
+        job = self.scheduler.get_job(task_id) if self.scheduler else None
+        if job is None:
+            self._tasks.pop(task_id, None)
+        else:
+            self._tasks[task_id] = self._task_from_job(job)
+        self._tasks_payload = None
+
+    def _on_job_event(self, event: JobEvent):
+        """增删改、暂停恢复及每次触发后（下次执行时间变化）更新任务索引并推送"""
+        if event.code == EVENT_ALL_JOBS_REMOVED:
+            for task_id in list(self._tasks):
+                self._publish("removed", task_id)
+            self._tasks.clear()
+            self._tasks_payload = None
+            return
+        if event.job_id is None:
+            return
+        previous = self._tasks.get(event.job_id)
+        self._refresh_task(event.job_id)
+        task = self._tasks.get(event.job_id)
+        if task is None:
+            if previous is not None:
+                self._publish("removed", event.job_id)
+        elif event.code == EVENT_JOB_ADDED:
+            self._publish("added", task.id, task=task.model_dump(mode="json"))
+        elif previous is None or task != previous:
+            # pause_job / resume_job 同样触发 JOB_MODIFIED，按启用状态区分
+            name = "modified"
+            if previous is not None and task.enabled != previous.enabled:
+                name = "resumed" if task.enabled else "paused"
+            self._publish(name, task.id, task=task.model_dump(mode="json"))
+
+    def _publish(self, name: str, task_id: str, **data):
+        """推送调度事件，附带任务当前的下次执行时间"""
+        task = self._tasks.get(task_id)
+        next_run_time = task.next_run_time if task else None
+        self.events.publish(
+            {
+                "type": "scheduler",
+                "event": name,
+                "task_id": task_id,
+                "next_run_time": next_run_time.isoformat() if next_run_time else None,
+                **data,
+            }
+        )
+
+    def _publish_execution(self, execution: TaskExecution):
+        self._publish(
+            _EXECUTION_EVENTS[execution.status],
+            execution.task_id,
+            execution=execution.model_dump(mode="json"),
+        )
 
     async def _add_execution(self, execution: TaskExecution):
         """添加执行记录"""
-        async with self._executions_lock:
-            self._executions.append(execution)
-            # 只保留最近 100 条记录
-            if len(self._executions) > 100:
-                self._executions = self._executions[-100:]
+        await self._executions.add(execution)
+        self._publish_execution(execution)
 
     async def _update_execution_status(
         self,
         execution_id: str,
-        status: Literal["running", "success", "failed", "stopped"],
+        status: Literal["queued", "running", "success", "failed", "stopped"],
         error_message: Optional[str] = None,
     ):
         """更新执行记录状态"""
-        async with self._executions_lock:
-            for execution in self._executions:
-                if execution.id == execution_id:
-                    execution.status = status
-                    execution.finished_at = datetime.now()
-                    if error_message:
-                        execution.error_message = error_message
-                    break
+        await self._executions.update_status(
+            execution_id, status, datetime.now(), error_message
+        )
+        execution = await self._executions.get(execution_id)
+        if execution is not None:
+            self._publish_execution(execution)
 
     async def create_task(self, task_create: ScheduledTaskCreate) -> ScheduledTask:
         """创建定时任务"""
@@ -183,17 +517,23 @@ class SchedulerManager:
         trigger = self._create_trigger(task_create.trigger_config)
 
         # 添加任务到调度器，存储完整的任务信息
+        now = datetime.now()
         self.scheduler.add_job(
-            self._execute_task,
+            run_scheduled_task,
             trigger,
             id=task_id,
             kwargs={
+                "schema_version": TASK_SCHEMA_VERSION,
                 "task_id": task_id,
                 "task_list": task_create.task_list,
                 "options": task_create.task_options,
                 "task_name": task_create.name,
+                "description": task_create.description or "",
+                "priority": task_create.priority,
                 "trigger_type": task_create.trigger_type,
                 "trigger_config": task_create.trigger_config.model_dump(),
+                "created_at": now,
+                "updated_at": now,
             },
         )
 
@@ -201,101 +541,37 @@ class SchedulerManager:
         if not task_create.enabled:
             self.scheduler.pause_job(task_id)
 
-        # 获取下次执行时间
-        job = self.scheduler.get_job(task_id)
-        next_run_time = job.next_run_time if job else None
-
-        # 创建任务对象
-        task = ScheduledTask(
-            id=task_id,
-            name=task_create.name,
-            description=task_create.description,
-            enabled=task_create.enabled,
-            trigger_type=task_create.trigger_type,
-            trigger_config=task_create.trigger_config,
-            task_list=task_create.task_list,
-            task_options=task_create.task_options,
-            next_run_time=next_run_time,
-        )
-
+        # 任务索引已由 JOB_ADDED / JOB_MODIFIED 事件更新
+        task = self._tasks[task_id]
         logger.info(f"创建定时任务: {task.name} ({task_id})")
         return task
 
     async def get_task(self, task_id: str) -> Optional[ScheduledTask]:
         """获取定时任务"""
-        if not self.scheduler:
-            return None
-        job = self.scheduler.get_job(task_id)
-        if not job:
-            return None
-
-        # 从 kwargs 中获取任务信息
-        task_name = job.kwargs.get("task_name", task_id)
-        task_list = job.kwargs.get("task_list", [])
-        task_options = job.kwargs.get("options", {})
-        trigger_type = job.kwargs.get("trigger_type", "cron")
-        trigger_config_dict = job.kwargs.get("trigger_config", {})
-
-        # 根据触发器类型重建配置对象
-        if trigger_type == "cron":
-            trigger_config = CronTriggerConfig(**trigger_config_dict)
-        elif trigger_type == "date":
-            trigger_config = DateTriggerConfig(**trigger_config_dict)
-        elif trigger_type == "interval":
-            trigger_config = IntervalTriggerConfig(**trigger_config_dict)
-        else:
-            trigger_config = CronTriggerConfig(cron="* * * * *")
-
-        return ScheduledTask(
-            id=task_id,
-            name=task_name,
-            description="",
-            enabled=job.next_run_time is not None,
-            trigger_type=trigger_type,
-            trigger_config=trigger_config,
-            task_list=task_list,
-            task_options=task_options,
-            next_run_time=job.next_run_time,
-        )
+        return self._tasks.get(task_id)
 
     async def get_all_tasks(self) -> List[ScheduledTask]:
         """获取所有定时任务"""
-        if not self.scheduler:
-            return []
-        tasks = []
-        jobs = self.scheduler.get_jobs()
-
-        for job in jobs:
-            task_name = job.kwargs.get("task_name", job.id)
-            task_list = job.kwargs.get("task_list", [])
-            task_options = job.kwargs.get("options", {})
-            trigger_type = job.kwargs.get("trigger_type", "cron")
-            trigger_config_dict = job.kwargs.get("trigger_config", {})
-
-            # 根据触发器类型重建配置对象
-            if trigger_type == "cron":
-                trigger_config = CronTriggerConfig(**trigger_config_dict)
-            elif trigger_type == "date":
-                trigger_config = DateTriggerConfig(**trigger_config_dict)
-            elif trigger_type == "interval":
-                trigger_config = IntervalTriggerConfig(**trigger_config_dict)
-            else:
-                trigger_config = CronTriggerConfig(cron="* * * * *")
-
-            task = ScheduledTask(
-                id=job.id,
-                name=task_name,
-                description="",
-                enabled=job.next_run_time is not None,
-                trigger_type=trigger_type,
-                trigger_config=trigger_config,
-                task_list=task_list,
-                task_options=task_options,
-                next_run_time=job.next_run_time,
-            )
-            tasks.append(task)
-
-        return tasks
+        return list(self._tasks.values())
+
+    def get_tasks_payload(self) -> tuple[bytes, str]:
+        """
+        任务列表接口的响应体与 ETag
+        只在任务变化后重新序列化一次，其余请求直接复用
+        """
+        if self._tasks_payload is None:
+            body = json.dumps(
+                {
+                    "status": "success",
+                    "tasks": [
+                        task.model_dump(mode="json") for task in self._tasks.values()
+                    ],
+                },
+                ensure_ascii=False,
+            ).encode("utf-8")
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            self._tasks_payload = (body, etag)
+        return self._tasks_payload
 
     async def update_task(
         self, task_id: str, task_update: ScheduledTaskUpdate
@@ -329,34 +605,25 @@ class SchedulerManager:
                 if task_update.task_options is not None
                 else current_kwargs.get("options", {})
             )
+            new_description = (
+                task_update.description
+                if task_update.description is not None
+                else current_kwargs.get("description", "")
+            )
+            new_priority = (
+                task_update.priority
+                if task_update.priority is not None
+                else current_kwargs.get("priority", 0)
+            )
             new_trigger_type = (
                 task_update.trigger_type
                 if task_update.trigger_type is not None
                 else current_kwargs.get("trigger_type", "cron")
             )
-            # 从字典重建触发器配置对象
-            current_trigger_config_dict = current_kwargs.get("trigger_config", {})
-            current_trigger_type = current_kwargs.get("trigger_type", "cron")
-
-            if current_trigger_type == "cron":
-                current_trigger_config = CronTriggerConfig(
-                    **current_trigger_config_dict
-                )
-            elif current_trigger_type == "date":
-                current_trigger_config = DateTriggerConfig(
-                    **current_trigger_config_dict
-                )
-            elif current_trigger_type == "interval":
-                current_trigger_config = IntervalTriggerConfig(
-                    **current_trigger_config_dict
-                )
-            else:
-                current_trigger_config = CronTriggerConfig(cron="* * * * *")
-
             new_trigger_config = (
                 task_update.trigger_config
                 if task_update.trigger_config is not None
-                else current_trigger_config
+                else self._trigger_config_from_kwargs(current_kwargs)
             )
 
             # 创建新的触发器
@@ -367,15 +634,25 @@ class SchedulerManager:
                 task_id,
                 trigger=trigger,
                 kwargs={
+                    "schema_version": TASK_SCHEMA_VERSION,
                     "task_id": task_id,
                     "task_list": new_task_list,
                     "options": new_options,
                     "task_name": new_name,
+                    "description": new_description,
+                    "priority": new_priority,
                     "trigger_type": new_trigger_type,
                     "trigger_config": new_trigger_config.model_dump(),
+                    "created_at": current_kwargs.get("created_at", datetime.now()),
+                    "updated_at": datetime.now(),
                 },
             )
 
+            # 已在排队的执行按新的优先级出队
+            queued = self._queued.get(task_id)
+            if queued is not None:
+                self._reprioritize(queued, new_priority)
+
             # 处理启用/暂停状态
             if task_update.enabled is not None:
                 if task_update.enabled:
@@ -425,7 +702,14 @@ class SchedulerManager:
             logger.error(f"恢复任务失败: {e}")
             return False
 
-    async def get_executions(self, limit: int = 50) -> List[TaskExecution]:
-        """获取执行历史"""
-        async with self._executions_lock:
-            return self._executions[-limit:]
+    async def get_executions(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status: Optional[str] = None,
+        task_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> tuple[int, List[TaskExecution]]:
+        """分页获取执行历史（按开始时间倒序），返回 (总数, 当前页记录)"""
+        return await self._executions.query(limit, offset, status, task_id, start, end)
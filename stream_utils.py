@@ -0,0 +1,370 @@
+import asyncio
+import itertools
+import struct
+import time
+import traceback
+from multiprocessing import shared_memory
+from typing import Callable, Literal, NamedTuple
+
+import numpy as np
+
+
+FrameFormat = Literal["jpeg", "webp"]
+
+# WebSocket 二进制帧头：格式(0=JPEG, 1=WebP)、序号、采集时间戳(Unix 秒)、编码耗时(毫秒)
+FRAME_HEADER = struct.Struct("<BQdf")
+FRAME_FORMAT_CODES: dict[str, int] = {"jpeg": 0, "webp": 1}
+
+
+class Frame(NamedTuple):
+    seq: int
+    data: dict[str, bytes]  # 格式 -> 编码结果
+    captured_at: float
+    encode_time: float
+
+
+class FrameDiffer:
+    """
+    画面变化检测
+    对截图做跨步降采样后逐点比较，画面静止时跳过编码，仅按间隔发送关键帧
+    """
+
+    def __init__(
+        self, step: int = 4, tolerance: int = 8, keyframe_interval: float = 2.0
+    ):
+        self.step = step
+        self.tolerance = tolerance
+        self.keyframe_interval = keyframe_interval
+        self._last: np.ndarray | None = None
+        self._last_keyframe = 0.0
+
+    def reset(self):
+        self._last = None
+
+    def changed(self, image: np.ndarray) -> bool:
+        thumb = image[:: self.step, :: self.step].astype(np.int16)
+        now = time.monotonic()
+        if (
+            self._last is None
+            or thumb.shape != self._last.shape
+            or now - self._last_keyframe >= self.keyframe_interval
+        ):
+            self._last_keyframe = now
+        elif not (np.abs(thumb - self._last) > self.tolerance).any():
+            return False
+        self._last = thumb
+        return True
+
+
+class StreamSession:
+    """
+    单个预览连接的码率控制与统计
+    根据采集、编码、发送耗时调整帧率与 JPEG 质量，使单帧延迟不超过 target_latency
+    """
+
+    def __init__(
+        self,
+        session_id: int,
+        max_fps: int,
+        width: int | None = None,
+        fmt: FrameFormat = "jpeg",
+        target_latency: float = 0.5,
+        min_quality: int = 40,
+        max_quality: int = 75,
+    ):
+        self.id = session_id
+        self.max_fps = max_fps
+        self.width = width
+        self.format = fmt
+        self.target_latency = target_latency
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.fps = float(max_fps)
+        self.quality = max_quality
+        self.capture_time = 0.0
+        self.encode_time = 0.0
+        self.send_time = 0.0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    @staticmethod
+    def _ewma(old: float, new: float, alpha: float = 0.3) -> float:
+        return new if old == 0.0 else old + alpha * (new - old)
+
+    def record(
+        self, size: int, capture_time: float, encode_time: float, send_time: float
+    ):
+        self.capture_time = self._ewma(self.capture_time, capture_time)
+        self.encode_time = self._ewma(self.encode_time, encode_time)
+        self.send_time = self._ewma(self.send_time, send_time)
+        self.frames_sent += 1
+        self.bytes_sent += size
+
+        interval = 1.0 / self.fps
+        latency = self.capture_time + self.encode_time + self.send_time
+        if latency > self.target_latency or self.send_time > interval * 0.8:
+            # 客户端跟不上：乘性降帧、降低画质
+            self.fps = max(1.0, self.fps * 0.75)
+            self.quality = max(self.min_quality, self.quality - 10)
+        elif latency < self.target_latency * 0.5 and self.send_time < interval * 0.3:
+            # 余量充足：加性恢复
+            self.fps = min(float(self.max_fps), self.fps + 1)
+            self.quality = min(self.max_quality, self.quality + 2)
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "max_fps": self.max_fps,
+            "width": self.width,
+            "format": self.format,
+            "fps": round(self.fps, 1),
+            "quality": self.quality,
+            "capture_ms": round(self.capture_time * 1000, 1),
+            "encode_ms": round(self.encode_time * 1000, 1),
+            "send_ms": round(self.send_time * 1000, 1),
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class FrameBroadcaster:
+    """
+    共享截图广播器
+    所有订阅者共用一个采集循环，按订阅者中最高的当前帧率采集，按最低的画质编码
+    每种订阅格式每帧只编码一次；订阅者只读取最新一帧，跟不上的订阅者自动跳帧
+    """
+
+    def __init__(
+        self,
+        grab: Callable[[], np.ndarray | None],
+        encode: Callable[[np.ndarray, int | None, int | None, FrameFormat], bytes],
+    ):
+        self._grab = grab
+        self._encode = encode
+        self._differ = FrameDiffer()
+        self._sessions: dict[int, StreamSession] = {}
+        self._ids = itertools.count(1)
+        self._frame: Frame | None = None
+        self._seq = 0
+        self._width: int | None = None
+        self._formats: frozenset[str] = frozenset()
+        self._cond = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+        # 编码失败过的格式，只打印一次错误
+        self._failed_formats: set[str] = set()
+        # 最近一帧的采集与编码耗时
+        self.capture_time = 0.0
+        self.encode_time = 0.0
+
+    def subscribe(
+        self, fps: int, width: int | None = None, fmt: FrameFormat = "jpeg"
+    ) -> StreamSession:
+        session = StreamSession(next(self._ids), fps, width, fmt)
+        self._sessions[session.id] = session
+        # 缓存帧超过关键帧间隔（画面长时间未变或采集循环刚重启）时不再直接交给新订阅者，
+        # 重置变化检测，下一次采集立即产出新的关键帧
+        frame = self._frame
+        if (
+            frame is not None
+            and time.time() - frame.captured_at > self._differ.keyframe_interval
+        ):
+            self._frame = None
+            self._differ.reset()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return session
+
+    def unsubscribe(self, session: StreamSession):
+        self._sessions.pop(session.id, None)
+
+    def stats(self) -> list[dict]:
+        return [session.stats() for session in self._sessions.values()]
+
+    async def next_frame(self, last_seq: int, fmt: FrameFormat = "jpeg") -> Frame:
+        """
+        等待比 last_seq 更新、且包含指定格式的帧
+        该格式无法编码（如 Pillow 不支持 WebP）时抛出 ValueError，避免调用方一直等待
+        """
+
+        def ready() -> bool:
+            return (
+                self._frame is not None
+                and self._frame.seq > last_seq
+                and fmt in self._frame.data
+            )
+
+        async with self._cond:
+            await self._cond.wait_for(lambda: ready() or fmt in self._failed_formats)
+            if not ready():
+                raise ValueError(f"无法编码 {fmt} 格式的画面")
+            return self._frame
+
+    def _target_width(self) -> int | None:
+        """按最大的预览宽度编码，任一订阅者需要原图时不缩放"""
+        widths = [session.width for session in self._sessions.values()]
+        if not widths or None in widths:
+            return None
+        return max(widths)
+
+    def _capture(
+        self, width: int | None, quality: int, formats: frozenset[str]
+    ) -> tuple[bool, Frame | None]:
+        """在工作线程中截图并编码，返回 (是否截图成功, 变化后的新帧)"""
+        started = time.perf_counter()
+        captured_at = time.time()
+        image = self._grab()
+        self.capture_time = time.perf_counter() - started
+        if image is None:
+            return False, None
+        # 尺寸或订阅格式变化时需要立即产出完整的一帧
+        if width != self._width or formats != self._formats:
+            self._width = width
+            self._formats = formats
+            self._differ.reset()
+        if not self._differ.changed(image):
+            return True, None
+        started = time.perf_counter()
+        data = {}
+        for fmt in formats:
+            # 单个格式编码失败（如 Pillow 不支持 WebP）不影响其它格式的订阅者
+            try:
+                data[fmt] = self._encode(image, width, quality, fmt)
+            except Exception:
+                if fmt not in self._failed_formats:
+                    self._failed_formats.add(fmt)
+                    traceback.print_exc()
+        self.encode_time = time.perf_counter() - started
+        if not data:
+            return True, None
+        return True, Frame(self._seq + 1, data, captured_at, self.encode_time)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._sessions:
+            started = loop.time()
+            sessions = list(self._sessions.values())
+            failed = len(self._failed_formats)
+            try:
+                captured, frame = await asyncio.to_thread(
+                    self._capture,
+                    self._target_width(),
+                    min(session.quality for session in sessions),
+                    frozenset(session.format for session in sessions),
+                )
+            except Exception:
+                # 单次采集出错不能结束循环，否则所有订阅者都会一直等待新帧
+                traceback.print_exc()
+                captured, frame = False, None
+            if len(self._failed_formats) != failed:
+                # 唤醒等待该格式的订阅者，由 next_frame 报错
+                async with self._cond:
+                    self._cond.notify_all()
+            if not captured:
+                # 设备未连接或截图失败
+                await asyncio.sleep(0.5)
+                continue
+            if frame is not None:
+                async with self._cond:
+                    self._seq = frame.seq
+                    self._frame = frame
+                    self._cond.notify_all()
+            if not self._sessions:
+                break
+            interval = 1.0 / max(session.fps for session in self._sessions.values())
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+
+class FrameRing:
+    """
+    共享内存帧环
+    写端把截图依次写入 slots 个槽位并递增序号，读端按序号零拷贝映射为 NumPy 数组
+    读端需在写端绕环一圈（写入 slots 帧）之前用完数据，可通过 is_current 校验
+    """
+
+    _LAYOUT = np.dtype([("slots", "<u8"), ("slot_size", "<u8")])
+    _HEADER = np.dtype(
+        [("seq", "<u8"), ("height", "<u4"), ("width", "<u4"), ("channels", "<u4")]
+    )
+
+    def __init__(
+        self, name: str | None = None, slots: int = 3, slot_size: int = 1920 * 1080 * 3
+    ):
+        """name 为空时创建新的帧环，否则按名称连接已有帧环（布局从共享内存读取）"""
+        if name is None:
+            self._shm = shared_memory.SharedMemory(
+                create=True,
+                size=self._LAYOUT.itemsize
+                + (self._HEADER.itemsize + slot_size) * slots,
+            )
+            self._owner = True
+            layout = np.ndarray((1,), self._LAYOUT, self._shm.buf)
+            layout["slots"], layout["slot_size"] = slots, slot_size
+            del layout
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+            layout = np.ndarray((1,), self._LAYOUT, self._shm.buf)
+            slots, slot_size = int(layout["slots"][0]), int(layout["slot_size"][0])
+            del layout
+        self.slots = slots
+        self.slot_size = slot_size
+        self._headers = np.ndarray(
+            (slots,), self._HEADER, self._shm.buf, offset=self._LAYOUT.itemsize
+        )
+        self._data = np.ndarray(
+            (slots, slot_size),
+            np.uint8,
+            self._shm.buf,
+            offset=self._LAYOUT.itemsize + self._HEADER.itemsize * slots,
+        )
+        if self._owner:
+            self._headers[:] = 0
+        self._seq = int(self._headers["seq"].max())
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def write(self, image: np.ndarray) -> int | None:
+        """写入一帧并返回序号，超出槽位容量时返回 None"""
+        if image.nbytes > self.slot_size or image.ndim != 3:
+            return None
+        seq = self._seq + 1
+        index = seq % self.slots
+        # 序号置 0 表示写入中，读端据此拒绝半帧
+        self._headers["seq"][index] = 0
+        np.copyto(self._data[index, : image.nbytes].reshape(image.shape), image)
+        height, width, channels = image.shape
+        self._headers["height"][index] = height
+        self._headers["width"][index] = width
+        self._headers["channels"][index] = channels
+        self._headers["seq"][index] = seq
+        self._seq = seq
+        return seq
+
+    def read(self, seq: int) -> np.ndarray | None:
+        """按序号读取帧，返回共享内存上的只读视图；该帧已被覆盖时返回 None"""
+        index = seq % self.slots
+        if not self.is_current(seq):
+            return None
+        shape = (
+            int(self._headers["height"][index]),
+            int(self._headers["width"][index]),
+            int(self._headers["channels"][index]),
+        )
+        view = self._data[index, : shape[0] * shape[1] * shape[2]].reshape(shape)
+        view.flags.writeable = False
+        return view
+
+    def is_current(self, seq: int) -> bool:
+        return int(self._headers["seq"][seq % self.slots]) == seq
+
+    def close(self):
+        del self._headers, self._data
+        try:
+            self._shm.close()
+        except BufferError:
+            # 仍有读端视图存活，映射随进程退出释放
+            pass
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,39 @@
+from maa.resource import Resource
+
+from maa_utils import MaaWorker
+
+# 按选项顺序排列的 pipeline_override，覆盖同一节点的同一字段、不同字段与嵌套参数
+OVERRIDES = [
+    {
+        "Start": {"action": "Custom", "custom_action_param": {"a": 1}},
+        "Next": {"enabled": False},
+    },
+    {"Start": {"custom_action_param": {"b": 2}, "pre_delay": 500}},
+    {"Next": {"enabled": True, "timeout": 3000}, "Other": {"max_hit": 2}},
+]
+
+
+def _nodes(resource: Resource) -> dict:
+    return {name: resource.get_node_data(name) for name in ("Start", "Next", "Other")}
+
+
+def test_merged_override_matches_applying_each_option():
+    sequential = Resource()
+    for override in OVERRIDES:
+        assert sequential.override_pipeline(override)
+
+    merged = {}
+    for override in OVERRIDES:
+        MaaWorker._merge_override(merged, override)
+    combined = Resource()
+    assert combined.override_pipeline(merged)
+
+    assert _nodes(combined) == _nodes(sequential)
+    assert merged["Start"]["custom_action_param"] == {"b": 2}
+
+
+def test_merge_override_does_not_alias_option_data():
+    merged = {}
+    MaaWorker._merge_override(merged, OVERRIDES[0])
+    merged["Start"]["custom_action_param"]["a"] = 99
+    assert OVERRIDES[0]["Start"]["custom_action_param"] == {"a": 1}
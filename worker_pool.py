@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from typing import Literal
+
+from log_utils import LogBridge, LogHistory, LogBroadcaster
+from maa_utils import MaaWorker
+from models.interface import InterfaceModel
+from process_worker import ProcessWorker
+from stream_utils import FrameBroadcaster
+
+DEFAULT_DEVICE = "default"
+
+
+class WorkerSlot:
+    """
+    单台设备的运行上下文
+    持有独立的 MaaWorker（Tasker / Controller / Resource）、日志通道和预览广播器
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        worker: MaaWorker | ProcessWorker,
+        message_conn: LogBridge,
+    ):
+        self.device_id = device_id
+        self.worker = worker
+        self.message_conn = message_conn
+        self.history_message = LogHistory(capacity=1000)
+        self.broadcaster = LogBroadcaster()
+        self.frame_broadcaster = FrameBroadcaster(
+            worker.get_screencap, worker.encode_frame
+        )
+        self.child_process: threading.Thread | None = None
+        # 手动启动与定时任务共用：持有期间完成 检查空闲 -> 设置选项 -> 启动线程
+        self.run_lock = asyncio.Lock()
+        self._stopped_thread: threading.Thread | None = None
+        self.resource_task: asyncio.Task | None = None
+        self.resource_status: dict = {"name": None, "status": "idle"}
+        self._monitor_task: asyncio.Task | None = None
+
+    def start(self):
+        self._monitor_task = asyncio.create_task(self._log_monitor())
+
+    def stop(self):
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        self.worker.close()
+
+    @property
+    def running(self) -> bool:
+        return self.child_process is not None and self.child_process.is_alive()
+
+    def start_run(self, task_list: list[str]) -> threading.Thread:
+        """在任务线程中执行任务链，调用方需持有 run_lock 并确认设备空闲"""
+        thread = threading.Thread(
+            target=self.worker.run, args=(task_list,), daemon=True
+        )
+        self.child_process = thread
+        thread.start()
+        return thread
+
+    def stop_run(self):
+        """请求终止当前任务，记录被终止的线程供执行记录区分状态"""
+        self._stopped_thread = self.child_process
+        self.worker.stop()
+
+    def was_stopped(self, thread: threading.Thread) -> bool:
+        return thread is self._stopped_thread
+
+    def info(self) -> dict:
+        return {
+            "device_id": self.device_id,
+            "connected": self.worker.connected,
+            "running": self.running,
+            "resource": self.resource_status,
+        }
+
+    def load_resource(self, name: str) -> asyncio.Task:
+        """
+        在后台线程加载资源，状态以 resource 事件推送到日志 SSE
+        同名资源正在加载时复用同一任务；不同资源按请求顺序依次加载
+        """
+        task = self.resource_task
+        if (
+            task is not None
+            and not task.done()
+            and self.resource_status["name"] == name
+        ):
+            return task
+        self.resource_task = asyncio.create_task(self._load_resource(name, task))
+        return self.resource_task
+
+    async def wait_resource(self) -> bool:
+        """等待进行中的资源加载，返回最近一次加载是否成功"""
+        if self.resource_task is None:
+            return True
+        # shield：请求被取消时不影响后台加载
+        return await asyncio.shield(self.resource_task)
+
+    async def _load_resource(self, name: str, previous: asyncio.Task | None) -> bool:
+        if previous is not None:
+            await previous
+        self._set_resource_status(name, "loading")
+        started = time.perf_counter()
+        try:
+            # 不与选项设置、任务启动交错执行
+            async with self.run_lock:
+                await asyncio.to_thread(self.worker.set_resource, name)
+        except Exception as e:
+            self._set_resource_status(name, "failed", message=str(e))
+            return False
+        self._set_resource_status(
+            name, "ready", elapsed=round(time.perf_counter() - started, 3)
+        )
+        return True
+
+    def _set_resource_status(self, name: str, status: str, **extra):
+        self.resource_status = {"name": name, "status": status, **extra}
+        self.broadcaster.publish({"type": "resource", **self.resource_status})
+
+    async def _log_monitor(self):
+        while True:
+            batch = await self.message_conn.get_batch()
+            seq = 0
+            for msg in batch:
+                seq = self.history_message.append(msg)
+            # 同一批次的多行日志合并为一个 SSE 帧
+            self.broadcaster.broadcast(seq, "\n".join(batch))
+
+            thread = self.child_process
+            if thread and any(
+                "所有任务完成" in msg or "任务已终止" in msg for msg in batch
+            ):
+                # 线程可能还在收尾，在线程池中等待，避免阻塞事件循环
+                await asyncio.to_thread(thread.join)
+                if self.child_process is thread:
+                    self.child_process = None
+
+
+class WorkerPool:
+    """
+    按设备标识（通常为设备地址）管理 WorkerSlot
+    未指定设备时使用启动时创建的默认设备
+    backend 为 process 时每台设备的 MaaWorker 运行在独立子进程中
+    """
+
+    def __init__(
+        self,
+        interface: InterfaceModel,
+        backend: Literal["thread", "process"] = "thread",
+        lazy_agent: bool = False,
+    ):
+        self._interface = interface
+        self._lazy_agent = lazy_agent
+        self._worker_cls = ProcessWorker if backend == "process" else MaaWorker
+        self._slots: dict[str, WorkerSlot] = {}
+        self._lock = asyncio.Lock()
+
+    def get(self, device_id: str | None = None) -> WorkerSlot | None:
+        return self._slots.get(device_id or DEFAULT_DEVICE)
+
+    def slots(self) -> list[WorkerSlot]:
+        return list(self._slots.values())
+
+    async def get_or_create(self, device_id: str | None = None) -> WorkerSlot:
+        device_id = device_id or DEFAULT_DEVICE
+        async with self._lock:
+            slot = self._slots.get(device_id)
+            if slot is None:
+                message_conn = LogBridge(asyncio.get_running_loop())
+                # MaaWorker 初始化会加载 Agent，放到线程中避免阻塞事件循环
+                worker = await asyncio.to_thread(
+                    self._worker_cls, message_conn, self._interface, self._lazy_agent
+                )
+                slot = WorkerSlot(device_id, worker, message_conn)
+                slot.start()
+                self._slots[device_id] = slot
+            return slot
+
+    def shutdown(self):
+        for slot in self._slots.values():
+            slot.stop()